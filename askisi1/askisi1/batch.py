@@ -0,0 +1,78 @@
+from testing import Test
+import argparse
+import random
+import sys
+
+#https://docs.python.org/3/library/concurrent.futures.html#processpoolexecutor
+"""
+A Monte Carlo batch runner: the predicted costs of a day are random (see Data.prediction_weight), so one run of Test.do_everything
+is only one sample. Here we run many (scenario file, seed) jobs on a pool of processes and average their summaries.
+
+Every job seeds python's random with its own seed before it creates its Test, so a job gives the same result no matter which process
+runs it, in which order, or how many processes we have (the batched numpy predictions are seeded from random too).
+
+From the command line: python batch.py sampleGraph1.txt sampleGraph2.txt --seeds 20 --workers 4
+"""
+
+def run_job(job): #job = (scenario file, seed, days), returns (scenario file, seed, summary of Test.do_everything)
+    filename, seed, days = job
+    random.seed(seed)
+    summary = Test(filename, quiet=True).do_everything(days)
+    return filename, seed, summary
+
+def make_jobs(filenames, seeds, days=80): #every scenario file with every seed
+    return [(filename, seed, days) for filename in filenames for seed in seeds]
+
+def run_batch(jobs, workers=None): #the results of every job, in the order of jobs
+    if workers == 1: #no pool at all, easier to debug and profile
+        return [run_job(job) for job in jobs]
+    from concurrent.futures import ProcessPoolExecutor #only when we really need processes
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run_job, jobs))
+
+"""
+Average the summaries of the results per scenario file: aggregate[filename][algorithm][key] = mean over all seeds of that file
+(keys are the ones of Test.do_everything: predicted, real, time, visited and cost for LRTA*)
+"""
+def aggregate(results):
+    aggregated = {}
+    runs = {}
+    for filename, _, summary in results:
+        runs[filename] = runs.get(filename, 0) + 1
+        totals = aggregated.setdefault(filename, {})
+        for name, values in summary.items():
+            for key, value in values.items():
+                totals.setdefault(name, {})
+                totals[name][key] = totals[name].get(key, 0) + value
+    for filename, totals in aggregated.items():
+        for values in totals.values():
+            for key in values:
+                values[key] /= runs[filename]
+    return aggregated, runs
+
+def print_aggregate(aggregated, runs, offset=4):
+    for filename, totals in aggregated.items():
+        print(filename, "(" + str(runs[filename]), "runs)")
+        for name, values in totals.items():
+            if "predicted" in values:
+                print(" "*offset, name, ": predicted cost", "{:.2f}".format(values["predicted"]), "real cost", "{:.2f}".format(values["real"]),
+                    "time", "%f" % values["time"], "visited nodes", "{:.2f}".format(values["visited"]))
+            else:
+                print(" "*offset, name, ": cost of all moves", "{:.2f}".format(values["cost"]), "time", "%f" % values["time"])
+        print()
+
+def main():
+    parser = argparse.ArgumentParser(description="Average Test.do_everything over many seeds and scenario files")
+    parser.add_argument("files", nargs="+", help="scenario files (in ../data)")
+    parser.add_argument("--seeds", type=int, default=10, help="number of seeds per file (0, 1, .., seeds-1 + --first-seed)")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--days", type=int, default=80)
+    parser.add_argument("--workers", type=int, default=None, help="number of processes (default: one per cpu)")
+    args = parser.parse_args()
+
+    seeds = range(args.first_seed, args.first_seed + args.seeds)
+    results = run_batch(make_jobs(args.files, seeds, args.days), args.workers)
+    print_aggregate(*aggregate(results))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+from pathlib import Path
+from data import Data
+from offline_algorithms import ucs, ida_star, dijkstra_create_heuristic
+from online_algorithms import OnlineLRTAstar
+import argparse
+import json
+import math
+import random
+import sys
+import time
+import tracemalloc
+
+#https://docs.python.org/3/library/tracemalloc.html
+"""
+A benchmark of our main phases over the scenario files in ../data, always with the same seed, so two runs do exactly the same work.
+
+Phases (for every scenario file):
+    parse: Data(filename) without the heuristic cache. The heuristic is built the first time it is used (see Data.heuristic), so this is
+        parsing the roads only
+    heuristic: dijkstra_create_heuristic alone
+    ucs, ida_star, lrta_star: the search of every day, for days days (the parsing of the predictions/traffic is NOT measured)
+For every phase we keep:
+    time: wall time in seconds, the best of repeats runs (the least noisy number we have)
+    expanded: the nodes the phase expanded (visited nodes of ucs/IDA*, nodes with a final cost for dijkstra, moves for LRTA*, nodes for parse)
+    peak: the peak memory in bytes that the phase allocated (on a separate run with tracemalloc on, since tracemalloc slows everything down)
+
+With --save the results become the baseline (a JSON file). Without it, we compare with the baseline and report every phase that got slower,
+expanded more nodes or needed more memory than the baseline (times and memory with a tolerance, since they are never exactly the same, and
+a time also has to be at least min_time_delta seconds slower, since phases of a few microseconds are mostly noise).
+The exit code is 1 if there was any regression.
+
+From the command line: python benchmark.py --save     and later     python benchmark.py
+"""
+DATA = Path(__file__).parent / "../data"
+SCENARIOS = ["sampleGraph1.txt", "sampleGraph2.txt", "sampleGraph3.txt"]
+BASELINE = DATA / "benchmark_baseline.json"
+PHASES = ["parse", "heuristic", "ucs", "ida_star", "lrta_star"]
+
+class Meter: #time, expanded nodes and peak memory of one phase
+    def __init__(self, trace):
+        self.trace = trace
+        self.time = 0
+        self.expanded = 0
+        self.peak = 0
+
+    def measure(self, call): #run call() and add it to our phase
+        if self.trace:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start_time = time.perf_counter()
+        result = call()
+        self.time += time.perf_counter()-start_time
+        if self.trace:
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1]-before)
+        return result
+
+def run_phase(phase, filename, seed, days, trace):
+    meter = Meter(trace)
+    random.seed(seed)
+    if phase == "parse":
+        data = meter.measure(lambda: Data(filename, heuristic_cache=False))
+        meter.expanded = len(data.graph)
+        return meter
+
+    data = Data(filename, heuristic_cache=False)
+    graph, ids = data.graph, data.graph.ids
+    start, goal = ids[data.source], ids[data.destination]
+    if phase == "heuristic":
+        heuristic_help = data.heuristic_help #lazy, and not part of this phase
+        costs = meter.measure(lambda: dijkstra_create_heuristic(graph, heuristic_help, goal))
+        meter.expanded = sum(1 for cost in costs if cost != math.inf)
+        return meter
+
+    lrta = OnlineLRTAstar(data)
+    heuristic = data.heuristic #lazy, build it before we measure the searches that use it
+    for _ in range(days):
+        data.parse_day_predictions()
+        if phase == "ucs":
+            meter.expanded += meter.measure(lambda: ucs(graph, data.weight, start, goal))[1]
+        elif phase == "ida_star":
+            meter.expanded += meter.measure(lambda: ida_star(graph, data.weight, heuristic, start, goal, len(graph)))[1]
+        elif phase == "lrta_star":
+            data.parse_actual_traffic()
+            meter.expanded += len(meter.measure(lrta.solve)[2])-1
+        data.next_day()
+    return meter
+
+#results[filename][phase] = {"time": .., "expanded": .., "peak": ..}
+def run_benchmark(filenames=SCENARIOS, seed=0, days=20, repeats=5, phases=PHASES):
+    results = {}
+    for filename in filenames:
+        results[filename] = {}
+        for phase in phases:
+            best = min(run_phase(phase, filename, seed, days, False).time for _ in range(repeats))
+            tracemalloc.start()
+            try:
+                traced = run_phase(phase, filename, seed, days, True)
+            finally:
+                tracemalloc.stop()
+            results[filename][phase] = {"time": best, "expanded": traced.expanded, "peak": traced.peak}
+    return results
+
+def save_baseline(results, path=BASELINE, settings=None):
+    with open(path, "w") as f:
+        json.dump({"settings": settings or {}, "results": results}, f, indent=2)
+
+def load_baseline(path=BASELINE):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+#every (filename, phase, what, baseline value, new value) that is worse than the baseline
+def find_regressions(baseline, results, time_tolerance=0.25, memory_tolerance=0.10, min_time_delta=0.001):
+    regressions = []
+    for filename, phases in results.items():
+        for phase, new in phases.items():
+            old = baseline.get(filename, {}).get(phase)
+            if old is None:
+                continue
+            if new["time"] > old["time"]*(1+time_tolerance) and new["time"]-old["time"] > min_time_delta:
+                regressions.append((filename, phase, "time", old["time"], new["time"]))
+            if new["expanded"] > old["expanded"]: #with the same seed this is exact
+                regressions.append((filename, phase, "expanded", old["expanded"], new["expanded"]))
+            if new["peak"] > old["peak"]*(1+memory_tolerance):
+                regressions.append((filename, phase, "peak", old["peak"], new["peak"]))
+    return regressions
+
+def print_results(results, baseline=None, offset=4):
+    for filename, phases in results.items():
+        print(filename)
+        for phase, new in phases.items():
+            old = (baseline or {}).get(filename, {}).get(phase)
+            line = "{:<10} time {:.6f}s  expanded {:>8}  peak {:>10} bytes".format(phase, new["time"], new["expanded"], new["peak"])
+            if old is not None and old["time"] > 0:
+                line += "  ({:+.1f}% time)".format((new["time"]/old["time"]-1)*100)
+            print(" "*offset, line)
+        print()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parsing, the heuristic, UCS, IDA* and LRTA* with a fixed seed")
+    parser.add_argument("files", nargs="*", default=SCENARIOS, help="scenario files (in ../data)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--days", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--baseline", default=str(BASELINE), help="the JSON baseline file")
+    parser.add_argument("--save", action="store_true", help="save the results as the new baseline")
+    parser.add_argument("--time-tolerance", type=float, default=0.25, help="allowed slow down before we call it a regression (0.25 = 25%%)")
+    parser.add_argument("--min-time-delta", type=float, default=0.001, help="smaller slow downs (in seconds) are never a regression")
+    args = parser.parse_args()
+
+    settings = {"seed": args.seed, "days": args.days, "repeats": args.repeats}
+    results = run_benchmark(args.files, args.seed, args.days, args.repeats)
+    if args.save:
+        print_results(results)
+        save_baseline(results, args.baseline, settings)
+        print("Baseline saved to", args.baseline)
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print_results(results)
+        print("No baseline at", args.baseline, "(run with --save to create one)")
+        return 0
+    if baseline["settings"] != settings:
+        print("Warning: the baseline was made with", baseline["settings"], "and this run with", settings)
+    print_results(results, baseline["results"])
+    regressions = find_regressions(baseline["results"], results, args.time_tolerance, min_time_delta=args.min_time_delta)
+    for filename, phase, what, old, new in regressions:
+        print("REGRESSION", filename, phase, what, ":", old, "->", new)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
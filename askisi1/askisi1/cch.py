@@ -0,0 +1,319 @@
+from array import array
+import math
+import time
+
+#https://arxiv.org/abs/1402.0402 (Customizable Contraction Hierarchies, Dibbelt, Strasser, Wagner)
+"""
+A Customizable Contraction Hierarchy (CCH) over our Graph.
+
+Our roads (the topology) never change during a run, only the weight of every edge changes every day. So we split the work in three:
+
+1. Preprocessing (once, does not look at any weight): we give every node a rank and "contract" the nodes from the lowest rank to the highest.
+   Contracting v connects all its neighbors with higher rank to each other (shortcut arcs), so after that every path can go
+   "up" the ranks and then "down" again without ever passing through a lower node. The rank comes from a nested dissection order
+   (see nested_dissection_order), so the separators of the network are contracted last and the elimination tree stays shallow. We also
+   store every triangle (v, u, w) with v lower than u and w, since these are the only ways a shortcut (u, w) can be made of two other arcs.
+2. Customization (every day, see customize()): every arc gets the weight of its edge (inf for shortcuts), and then we go through the
+   triangles from the lowest v up: metric(u, w) = min(metric(u, w), metric(v, u) + metric(v, w)). One pass over flat lists, no searching,
+   or one numpy scatter-min per level of the elimination tree with customize(batched=True).
+3. Query (see query()): from start we only go up, from end we only go up, and the cheapest node where the two meet is our answer.
+   In a CCH all the upward neighbors of a node are its ancestors in the elimination tree (parent = the lowest ranked upward neighbor),
+   so both "searches" are just walks up the tree, without any priority queue.
+The path is made of arcs, and every shortcut remembers the node v of the triangle that gave its weight (middle), so we unpack it
+back to the nodes of our graph.
+
+IMPORTAND: this is NOT a faster way to answer one query per day. A network without a road hierarchy (like the grids of generator.py) has
+millions of triangles: on a 10000 node grid about 4.7 million, so the preprocessing takes a couple of seconds and the customization of every
+day about 0.6-1 s (0.15 s batched), while one ucs takes about 0.04 s. A query after that takes a few milliseconds, so the CCH only pays
+off when a day has many queries (tens at least, see Data.find_batch_paths for the other way of sharing work between queries).
+"""
+
+def bfs_levels(graph, part, root): #the BFS levels of the nodes of part (part[node] == True) from root, only walking inside part
+    offsets, neighbors = graph.offsets, graph.neighbors
+    seen = {root}
+    levels = [[root]]
+    while True:
+        level = []
+        for node in levels[-1]:
+            for k in range(offsets[node], offsets[node+1]):
+                neighbor = neighbors[k]
+                if part[neighbor] and neighbor not in seen:
+                    seen.add(neighbor)
+                    level.append(neighbor)
+        if not level:
+            return levels
+        levels.append(level)
+
+def separator_level(levels, size): #the BFS level we cut at: the smallest one that leaves at least a quarter of the nodes on each side
+    best, best_size, below = None, None, len(levels[0])
+    for level in range(1, len(levels)-1):
+        above = size-below-len(levels[level])
+        if min(below, above) >= size//4 and (best is None or len(levels[level]) < best_size):
+            best, best_size = level, len(levels[level])
+        below += len(levels[level])
+    if best is None: #no balanced cut, the middle level
+        return len(levels)//2
+    return best
+
+"""
+The elimination order: nested dissection with BFS level separators. A part of the graph (at first all of it) is cut in two by a BFS level
+(every node of a level only has neighbors in the same or the next/previous level, so a level is a separator), the separator gets the highest
+ranks that are left, and both sides are cut again the same way. The separators of a grid like network are about sqrt(nodes) long, so the
+elimination tree stays shallow and the contraction adds few shortcuts. A part that is not connected is split into its components first.
+Returns order (order[rank] = node).
+"""
+def nested_dissection_order(graph, small=4):
+    n = len(graph)
+    order = [0]*n
+    next_rank = n-1
+    part = [False]*n
+    parts = [list(range(n))]
+    while parts:
+        nodes = parts.pop()
+        for node in nodes:
+            part[node] = True
+        levels = bfs_levels(graph, part, nodes[0])
+        reached = sum(len(level) for level in levels)
+        if reached < len(nodes): #more than one component: this one, and the rest as another part
+            component = {node for level in levels for node in level}
+            for node in nodes:
+                part[node] = False
+            parts.append([node for node in nodes if node not in component])
+            parts.append([node for level in levels for node in level])
+            continue
+        if len(nodes) > small: #cut at a level of a BFS from the end of a longest BFS path (a "peripheral" node), so the levels are many and small
+            levels = bfs_levels(graph, part, levels[-1][0])
+        if len(nodes) <= small or len(levels) <= 2: #nothing to cut, rank the nodes as they are
+            separator, sides = nodes, []
+        else:
+            level = separator_level(levels, len(nodes))
+            separator = levels[level]
+            sides = [[node for below in levels[:level] for node in below], [node for above in levels[level+1:] for node in above]]
+        for node in nodes:
+            part[node] = False
+        for node in separator:
+            order[next_rank] = node
+            next_rank -= 1
+        parts.extend(side for side in sides if side)
+    return order
+
+#the upward neighbors of every node when we contract them in order, with every shortcut (fill in) that contraction adds.
+#Contracting v connects all its upward neighbors to each other, but it is enough to give them to the lowest of them (v's parent in the
+#elimination tree): when the parent is contracted it passes them on, and so on up the tree
+def contract(graph, order):
+    rank = [0]*len(graph)
+    for position, node in enumerate(order):
+        rank[node] = position
+    up = [set() for _ in range(len(graph))]
+    for node_a, node_b in graph.edge_nodes:
+        if rank[node_a] < rank[node_b]:
+            up[node_a].add(node_b)
+        else:
+            up[node_b].add(node_a)
+    for node in order:
+        if up[node]:
+            parent = min(up[node], key=rank.__getitem__)
+            up[parent] |= up[node]
+            up[parent].discard(parent)
+    return rank, up
+
+"""
+    A customizable contraction hierarchy
+
+    ...
+
+    Attributes
+    ----------
+    rank : List
+        node id -> its rank (position in the contraction order)
+    up_offsets, up_neighbors, up_arcs : array
+        The upward arcs, CSR like graph.py: the upward neighbors of node v are up_neighbors[up_offsets[v]:up_offsets[v+1]] (lowest rank first)
+        and up_arcs has the arc id of each one
+    arc_index : Dictionary
+        (smaller node id, bigger node id) -> arc id, for every arc (original edges and shortcuts)
+    edge_arc : array
+        edge id -> the arc id of that edge
+    parent : array
+        node id -> its parent in the elimination tree (-1 for a root)
+    triangle_vu, triangle_vw, triangle_uw, triangle_v : array
+        The lower triangles, in the order the customization needs them (by the level of v in the elimination tree, from the leaves up)
+    level : List
+        node id -> its level in the elimination tree (0 for a leaf)
+    level_starts : array
+        level -> the index of the first triangle of that level (and one more entry, the number of triangles)
+    metric : List
+        arc id -> weight of the arc for the current day (after customize())
+    middle : List
+        arc id -> the node v of the triangle that gave the arc its weight, -1 if it is the weight of the edge itself
+    distance, came_from : tuple
+        (forward, backward) upward distances and the node we came from, one slot per node, reused by every query
+"""
+class CCH:
+    def __init__(self, graph):
+        order = nested_dissection_order(graph)
+        self.rank, up = contract(graph, order)
+
+        self.arc_index = {}
+        up_offsets, up_neighbors, up_arcs = [0], [], []
+        self.parent = array("i", [-1])*len(graph)
+        for node in range(len(graph)):
+            for neighbor in sorted(up[node], key=self.rank.__getitem__):
+                up_neighbors.append(neighbor)
+                up_arcs.append(self.arc(node, neighbor, True))
+            if up[node]:
+                self.parent[node] = up_neighbors[up_offsets[-1]]
+            up_offsets.append(len(up_neighbors))
+        self.up_offsets = array("i", up_offsets)
+        self.up_neighbors = array("i", up_neighbors)
+        self.up_arcs = array("i", up_arcs)
+        self.edge_arc = array("i", (self.arc_index[nodes] for nodes in graph.edge_nodes))
+
+        #the triangles (v, u, w) of every v: u, w are two upward neighbors of v, and (u, w) is an arc too (u is lower, so w is one of ITS upward
+        #neighbors), found in up_arc of u instead of arc_index, since there are millions of them
+        up_arc = [dict(zip(self.up_neighbors[self.up_offsets[node]:self.up_offsets[node+1]], self.up_arcs[self.up_offsets[node]:self.up_offsets[node+1]]))
+            for node in range(len(graph))]
+        #the level of every node in the elimination tree (0 for a leaf, 1 + the highest level of its children). The arcs (v, u) of a node v are
+        #final once the triangles of every node below v are done, so we keep the triangles grouped by the level of v (and by rank inside a
+        #level): each level only reads arcs that lower levels finished and only writes arcs of higher nodes, see customize(batched=True)
+        self.level = [0]*len(graph)
+        for node in order:
+            parent = self.parent[node]
+            if parent >= 0 and self.level[parent] <= self.level[node]:
+                self.level[parent] = self.level[node]+1
+        self.level_starts = array("i") #level -> the index of its first triangle
+        self.triangle_vu, self.triangle_vw, self.triangle_uw, self.triangle_v = array("i"), array("i"), array("i"), array("i")
+        for node in sorted(order, key=self.level.__getitem__):
+            while len(self.level_starts) <= self.level[node]:
+                self.level_starts.append(len(self.triangle_v))
+            start, end = self.up_offsets[node], self.up_offsets[node+1]
+            neighbors, arcs = self.up_neighbors[start:end], self.up_arcs[start:end]
+            for i in range(len(neighbors)-1):
+                higher = neighbors[i+1:]
+                self.triangle_vu.extend(array("i", [arcs[i]])*len(higher))
+                self.triangle_vw.extend(arcs[i+1:])
+                self.triangle_uw.extend(array("i", map(up_arc[neighbors[i]].__getitem__, higher)))
+                self.triangle_v.extend(array("i", [node])*len(higher))
+
+        self.level_starts.append(len(self.triangle_v))
+        self.batch = None #numpy views of the triangles for customize(batched=True), created the first time we use it
+
+        self.metric = [math.inf]*len(self.arc_index)
+        self.middle = [-1]*len(self.arc_index)
+        #the upward distances and where we came from, of the two walks of a query. Allocated once, and a query puts back inf / -1 only on the
+        #nodes it walked, so a query never touches the rest
+        self.distance = ([math.inf]*len(graph), [math.inf]*len(graph))
+        self.came_from = (array("i", [-1])*len(graph), array("i", [-1])*len(graph))
+
+    def arc(self, node_a, node_b, create=False): #arc id of the two nodes (creating it if create)
+        key = (node_a, node_b) if node_a < node_b else (node_b, node_a)
+        arc = self.arc_index.get(key)
+        if arc is None and create:
+            arc = len(self.arc_index)
+            self.arc_index[key] = arc
+        return arc
+
+    def number_of_arcs(self):
+        return len(self.arc_index)
+
+    #the daily pass: weight = Data.weight (index = edge id, None if no road that day). Returns the time it took.
+    #batched = True does every level of triangles at once with numpy (see vectorized.py), instead of one triangle at a time
+    def customize(self, weight, batched=False):
+        start_time = time.perf_counter()
+        if batched:
+            self.customize_batched(weight)
+            return time.perf_counter()-start_time
+        metric = [math.inf]*len(self.arc_index)
+        middle = [-1]*len(self.arc_index)
+        for edge, arc in enumerate(self.edge_arc):
+            if weight[edge] is not None:
+                metric[arc] = weight[edge]
+        for vu, vw, uw, v in zip(self.triangle_vu, self.triangle_vw, self.triangle_uw, self.triangle_v):
+            through_v = metric[vu]+metric[vw]
+            if through_v < metric[uw]:
+                metric[uw] = through_v
+                middle[uw] = v
+        self.metric = metric
+        self.middle = middle
+        return time.perf_counter()-start_time
+
+    def customize_batched(self, weight):
+        import vectorized #numpy is only needed for this
+        np = vectorized.np
+        if self.batch is None:
+            self.batch = {name: np.frombuffer(values, dtype=np.int32) for name, values in (("vu", self.triangle_vu), ("vw", self.triangle_vw),
+                ("uw", self.triangle_uw), ("v", self.triangle_v), ("edge_arc", self.edge_arc))}
+        metric = np.full(len(self.arc_index), np.inf)
+        metric[self.batch["edge_arc"]] = np.array([math.inf if cost is None else cost for cost in weight], dtype=np.float64)
+        middle = vectorized.customize_levels(metric, self.batch["vu"], self.batch["vw"], self.batch["uw"], self.batch["v"], self.level_starts)
+        self.metric = metric.tolist() #lists, the queries index them one arc at a time
+        self.middle = middle.tolist()
+
+    #walk up the elimination tree from node, filling distance (the upward distance of the ancestors we can reach) and came_from (the node we came
+    #from). Returns the nodes we walked (in order) and how many arcs we relaxed
+    def upward(self, node, distance, came_from):
+        walked = []
+        relaxed = 0
+        metric, up_offsets, up_neighbors, up_arcs, parent = self.metric, self.up_offsets, self.up_neighbors, self.up_arcs, self.parent
+        distance[node] = 0
+        while node != -1:
+            walked.append(node)
+            cost = distance[node]
+            if cost != math.inf:
+                relaxed += up_offsets[node+1]-up_offsets[node]
+                for k in range(up_offsets[node], up_offsets[node+1]):
+                    neighbor = up_neighbors[k]
+                    if cost+metric[up_arcs[k]] < distance[neighbor]:
+                        distance[neighbor] = cost+metric[up_arcs[k]]
+                        came_from[neighbor] = node
+            node = parent[node]
+        return walked, relaxed
+
+    def unpack(self, node_a, node_b): #the nodes of the arc node_a -> node_b, without node_a
+        nodes = []
+        stack = [(node_a, node_b)]
+        while stack:
+            node_a, node_b = stack.pop()
+            v = self.middle[self.arc(node_a, node_b)]
+            if v < 0:
+                nodes.append(node_b)
+            else: #first node_a -> v and then v -> node_b, so we push them the other way around
+                stack.append((v, node_b))
+                stack.append((node_a, v))
+        return nodes
+
+    def arcs_to(self, came_from, start, node): #the upward nodes start -> .. -> node
+        nodes = [node]
+        while nodes[-1] != start:
+            nodes.append(came_from[nodes[-1]])
+        nodes.reverse()
+        return nodes
+
+    #same return values as our other searches (time, visited nodes, cost, path of node ids), visited nodes = the nodes of the two walks.
+    #customize() has to be called with the weights of the day first. stats (a dictionary, if we pass one) gets stats["edges_relaxed"], the upward arcs
+    #the two walks relaxed
+    def query(self, start, end, stats=None):
+        start_time = time.perf_counter()
+        (forward, backward), (forward_from, backward_from) = self.distance, self.came_from
+        forward_walked, forward_relaxed = self.upward(start, forward, forward_from)
+        backward_walked, backward_relaxed = self.upward(end, backward, backward_from)
+        if stats is not None:
+            stats["edges_relaxed"] = forward_relaxed+backward_relaxed
+        cost, meeting = math.inf, -1
+        for node in forward_walked: #both walks end at the root, every node where they meet is on both
+            if forward[node]+backward[node] < cost:
+                cost, meeting = forward[node]+backward[node], node
+
+        path = []
+        if meeting >= 0:
+            up_nodes = self.arcs_to(forward_from, start, meeting)
+            down_nodes = self.arcs_to(backward_from, end, meeting)[::-1] #meeting -> .. -> end
+            path = [start]
+            for node_a, node_b in zip(up_nodes, up_nodes[1:]):
+                path += self.unpack(node_a, node_b)
+            for node_a, node_b in zip(down_nodes, down_nodes[1:]):
+                path += self.unpack(node_a, node_b)
+        for distance, came_from, walked in ((forward, forward_from, forward_walked), (backward, backward_from, backward_walked)):
+            for node in walked: #ready for the next query
+                distance[node] = math.inf
+                came_from[node] = -1
+        return (time.perf_counter()-start_time), len(forward_walked)+len(backward_walked), cost, path
@@ -0,0 +1,162 @@
+from pathlib import Path
+from data import Data
+from generator import generate
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+
+"""
+Checks every search engine against ucs (lazy heap, the plain dijkstra we trust) on the scenario files in ../data and on a few graphs that
+generator.py makes. For every day we parse the predictions and every engine must find the same cost as ucs, and (if there is a route) a path
+from the source to the destination whose cost with today's weights is that cost. Costs are compared with a tiny tolerance, since the engines
+add the same weights in a different order.
+
+Engines (see ENGINES):
+    ucs indexed, bidirectional ucs, A*, A* with landmarks (ALT), IDA*, IDA* with the transposition table (TT), IDA* with a bigger threshold
+    step (branch and bound), IDA* with landmarks, LPA* (kept from day to day, so its repairs are checked too), CCH (customized one edge at a time
+    and with numpy) and batch paths (shortest path trees).
+Besides the source -> destination of the file we also check a few random pairs of nodes (pairs of them), with the engines that work for any destination
+(A*, IDA* and LPA* use the heuristic of the destination of the file, so they only run on that one).
+On the last day (before it ends) we also jump to the past days with Data.replay_day, back to the first one and forward again, so the engines
+that keep something from their last search (LPA*) must be right when the weights jump to any day, not only to the next one.
+Then we read every day again (twice) with parse_day_predictions(day), which draws new predicted weights for a day the engines already saw.
+
+Prints every mismatch and exits with 1 if there was any.
+
+From the command line: python check_engines.py     or     python check_engines.py sampleGraph1.txt --days 10 --generated 0
+"""
+DATA = Path(__file__).parent / "../data"
+SCENARIOS = ["sampleGraph1.txt", "sampleGraph2.txt", "sampleGraph3.txt"]
+#(file name, arguments of generator.generate), small enough for plain IDA*
+GENERATED = [
+    ("grid.txt", {"nodes": 64, "topology": "grid"}),
+    ("random.txt", {"nodes": 80, "topology": "random", "degree": 3}),
+    ("parallel.txt", {"nodes": 60, "topology": "random", "degree": 4, "multiplicity": 2.5}),
+    ("sparse.txt", {"nodes": 100, "topology": "random", "degree": 2.2}),
+]
+
+def cch(d, batched): #a new customization every time, so both ways of customizing are checked on the same day
+    d.cch_customized = False
+    result = d.find_cch_path(batched)
+    d.cch_customized = False
+    return result
+
+def batch(d):
+    search_time, trees, results = d.find_batch_paths([(d.source, d.destination)])
+    cost, path = results[0]
+    return search_time, trees, cost, path
+
+def has_numpy():
+    try:
+        import numpy
+    except ImportError:
+        return False
+    return True
+
+#(name, function(d) -> (time, visited, cost, path) for d.source -> d.destination, if it works for any destination, if it needs numpy)
+ENGINES = [
+    ("ucs indexed", lambda d: d.find_ucs_path(heap="indexed"), True, False),
+    ("bidirectional", lambda d: d.find_ucs_path(bidirectional=True), True, False),
+    ("A*", lambda d: d.find_astar_path(), False, False),
+    ("ALT A*", lambda d: d.find_astar_path(landmarks=True), True, False),
+    ("IDA*", lambda d: d.find_ida_star_path(), False, False),
+    ("IDA* TT", lambda d: d.find_ida_star_path(transposition_size=10000), False, False),
+    ("IDA* B&B", lambda d: d.find_ida_star_path(threshold_factor=1.5, threshold_bucket=5), False, False),
+    ("ALT IDA* TT", lambda d: d.find_ida_star_path(transposition_size=10000, landmarks=True), True, False),
+    ("LPA*", lambda d: d.find_lpa_star_path(), False, False),
+    ("CCH", lambda d: cch(d, False), True, False),
+    ("CCH batched", lambda d: cch(d, True), True, True),
+    ("batch paths", batch, True, False),
+]
+
+def same_cost(a, b):
+    if a == math.inf or b == math.inf:
+        return a == b
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
+
+def path_problem(d, path, cost): #None if path is a route from d.source to d.destination that costs cost today, or else what is wrong with it
+    if cost == math.inf:
+        return None if not path else "a path without a route"
+    if not path or path[0] != d.source or path[-1] != d.destination:
+        return "does not go from " + d.source + " to " + d.destination
+    for node_a, node_b in zip(path, path[1:]):
+        edge = d.edge(node_a, node_b)
+        if edge is None or d.weight[edge] is None:
+            return "uses " + node_a + " -> " + node_b + " which has no road today"
+    if not same_cost(d.predicted_path_cost(path), cost):
+        return "costs " + str(d.predicted_path_cost(path)) + " and not " + str(cost)
+    return None
+
+def check_pair(d, engines, day, mismatches):
+    expected = d.find_ucs_path()[2]
+    for name, engine, _, _ in engines:
+        cost, path = engine(d)[2:]
+        if not same_cost(cost, expected):
+            mismatches.append((day, name, d.source, d.destination, "cost " + str(cost) + " and ucs " + str(expected)))
+            continue
+        problem = path_problem(d, path, cost)
+        if problem is not None:
+            mismatches.append((day, name, d.source, d.destination, "the path " + problem))
+
+def check_scenario(filename, days=5, pairs=3, seed=0):
+    rand = random.Random(seed)
+    engines = [engine for engine in ENGINES if not engine[3] or has_numpy()]
+    d = Data(filename, heuristic_cache=False)
+    source, destination = d.source, d.destination
+    others = [(rand.choice(d.graph.names), rand.choice(d.graph.names)) for _ in range(pairs)]
+    mismatches = []
+    try:
+        for day in range(1, days+1):
+            d.parse_day_predictions()
+            check_pair(d, engines, day, mismatches)
+            for other_source, other_destination in others: #only the engines that work for any destination
+                d.source, d.destination = other_source, other_destination
+                check_pair(d, [engine for engine in engines if engine[2]], day, mismatches)
+            d.source, d.destination = source, destination
+            if day < days:
+                d.next_day()
+        for day in list(range(days-1, 0, -1)) + list(range(2, days)):
+            d.replay_day(day)
+            check_pair(d, engines, str(day) + " (replay)", mismatches)
+        for day in range(1, days+1):
+            for _ in range(2):
+                d.parse_day_predictions(day)
+                check_pair(d, engines, str(day) + " (read again)", mismatches)
+    finally:
+        d.close()
+    return mismatches
+
+def generate_scenarios(folder, days, seed): #write GENERATED in folder, return their names for Data (relative to ../data)
+    filenames = []
+    for name, options in GENERATED:
+        path = os.path.join(folder, name)
+        generate(path, days=days, seed=seed, **options)
+        filenames.append(os.path.relpath(path, DATA))
+    return filenames
+
+def main():
+    parser = argparse.ArgumentParser(description="Check every search engine against ucs")
+    parser.add_argument("files", nargs="*", default=SCENARIOS, help="scenario files (in ../data)")
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--pairs", type=int, default=3, help="random source -> destination pairs to check every day, besides the one of the file")
+    parser.add_argument("--generated", type=int, default=len(GENERATED), help="how many of the generated graphs to check too")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed) #the predicted weights are random (see Data.prediction_weight)
+    failed = False
+    with tempfile.TemporaryDirectory() as folder:
+        generated = generate_scenarios(folder, args.days, args.seed)[:args.generated]
+        for filename in args.files + generated:
+            mismatches = check_scenario(filename, args.days, args.pairs, args.seed)
+            print(Path(filename).name + ":", "OK" if not mismatches else str(len(mismatches)) + " mismatches")
+            for day, name, source, destination, problem in mismatches:
+                print("    day", day, name, source, "->", destination + ":", problem)
+            failed = failed or bool(mismatches)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+from array import array
+from graph import Graph
+from traffic import traffic_code, road_costs
+import hashlib
+import mmap
+import struct
+import sys
+
+#https://docs.python.org/3/library/mmap.html
+#https://docs.python.org/3/library/stdtypes.html#memoryview.cast
+"""
+A compiled (binary) version of our scenario files, so Data can start without parsing any text.
+
+compile_scenario("sampleGraph1.txt", "sampleGraph1.askc") reads the text file ONCE and writes:
+    header: MAGIC, then VERSION and the number of nodes, edges, roads, prediction days, actual traffic days, the source id and the destination id
+    node names: the length in bytes, then all the names joined with "\n" (utf-8)
+    road names: the same for the roads
+    road_a, road_b, road_normal, road_edge: int32 arrays, index = road id (the two node ids, normal cost and edge id of every road)
+    road_cost: float64 array of (low, normal, heavy) for every road, exactly the road_cost list of Data
+    edge_a, edge_b: int32 arrays, index = edge id (Graph.edge_nodes)
+    csr_offsets, csr_neighbors, csr_edge_ids: int32 arrays, the CSR adjacency of graph.py
+    predictions: uint8 matrix (prediction days x roads) with the traffic code of every road every day (MISSING if the road had no prediction)
+    actual: uint8 matrix (actual traffic days x roads), the same for the real traffic
+All numbers are little endian and every section starts at a multiple of 8 bytes.
+
+CompiledScenario(path) mmaps such a file (close() unmaps it). The arrays are memoryviews straight on the mapped file (zero copy), and the traffic of a day is
+just a slice of the matrix. Data(filename) checks the MAGIC and loads compiled files this way (see Data.load_compiled).
+The prediction lines of a day are processed in road id order (not in the order of the text file), so random draws per road can be in a different
+order than with the text file.
+
+From the command line: python compiled.py ../data/sampleGraph1.txt ../data/sampleGraph1.askc
+"""
+MAGIC = b"ASKISI1\x00"
+VERSION = 1
+HEADER = struct.Struct("<8s8I") #magic, version, nodes, edges, roads, prediction days, actual days, source, destination
+MISSING = 255 #traffic code of a road without a prediction/traffic in some day
+
+def is_compiled(path):
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+def pad(f): #move to the next multiple of 8 bytes
+    f.write(b"\x00"*(-f.tell() % 8))
+
+def write_array(f, typecode, values):
+    values = array(typecode, values)
+    if sys.byteorder != "little":
+        values.byteswap()
+    f.write(values.tobytes())
+    pad(f)
+
+def write_names(f, names):
+    blob = "\n".join(names).encode()
+    f.write(struct.pack("<I", len(blob)))
+    f.write(blob)
+    pad(f)
+
+def read_name(line, tag): #same as Data.parse_source / Data.parse_destination
+    return line.replace("<"+tag+">", "").replace("</"+tag+">", "").strip()
+
+#read the <Day> blocks of a section until its closing tag, write every day as one row of traffic codes and return how many days we wrote
+def write_days(src, f, road_id, end_tag):
+    days = 0
+    line = src.readline().strip()
+    while line != end_tag:
+        if line == "<Day>":
+            row = bytearray([MISSING])*len(road_id)
+            line = src.readline().strip()
+            while line != "</Day>":
+                tmp = line.replace(" ", "").split(";")
+                row[road_id[tmp[0]]] = traffic_code(tmp[1])
+                line = src.readline().strip()
+            f.write(row) #one day at a time, so we never keep all the days in memory
+            days += 1
+        line = src.readline().strip()
+    pad(f)
+    return days
+
+def compile_scenario(text_path, out_path):
+    graph = Graph()
+    road_names, road_a, road_b, road_normal, road_edge = [], [], [], [], []
+    road_id = {}
+    with open(text_path, "r") as src, open(out_path, "wb") as f:
+        source = read_name(src.readline(), "Source")
+        destination = read_name(src.readline(), "Destination")
+        src.readline() #<Roads>
+        line = src.readline().strip()
+        while line != "</Roads>":
+            tmp = line.replace(" ", "").split(";")
+            node_a, node_b = graph.intern(tmp[1]), graph.intern(tmp[2])
+            road_id[tmp[0]] = len(road_names)
+            road_names.append(tmp[0])
+            road_a.append(node_a)
+            road_b.append(node_b)
+            road_normal.append(int(tmp[3]))
+            road_edge.append(graph.add_edge(node_a, node_b))
+            line = src.readline().strip()
+        graph.build()
+
+        f.write(b"\x00"*HEADER.size) #we write the real header at the end, when we know the number of days
+        pad(f)
+        write_names(f, graph.names)
+        write_names(f, road_names)
+        for values in (road_a, road_b, road_normal, road_edge):
+            write_array(f, "i", values)
+        write_array(f, "d", [cost for normal in road_normal for cost in road_costs(normal)])
+        write_array(f, "i", [node_a for node_a, _ in graph.edge_nodes])
+        write_array(f, "i", [node_b for _, node_b in graph.edge_nodes])
+        for values in (graph.offsets, graph.neighbors, graph.edge_ids):
+            write_array(f, "i", values)
+
+        while src.readline().strip() != "<Predictions>":
+            pass
+        prediction_days = write_days(src, f, road_id, "</Predictions>")
+        while src.readline().strip() != "<ActualTrafficPerDay>":
+            pass
+        actual_days = write_days(src, f, road_id, "</ActualTrafficPerDay>")
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, len(graph.names), graph.number_of_edges(), len(road_names), prediction_days, actual_days,
+            graph.ids[source], graph.ids[destination]))
+
+"""
+    A compiled scenario file, memory mapped
+
+    ...
+
+    Attributes
+    ----------
+    node_names, road_names : List
+        id -> name
+    road_a, road_b, road_normal, road_edge, road_cost, edge_a, edge_b, offsets, neighbors, edge_ids : memoryview
+        The arrays described above, straight on the mapped file. road_cost is flat: road_cost[3*road + traffic]
+    roads_hash : hashlib object
+        sha256 of the node names and road arrays, used by Data for the heuristic cache (like the hash of the <Roads> lines of a text file).
+        Computed the first time we use it
+"""
+class CompiledScenario:
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+        self.views = [] #every memoryview take() gave out, so close() can release them
+        self.position = 0
+
+        magic, version, self.nodes, self.edges, self.roads, self.prediction_days, self.actual_days, self.source, self.destination = \
+            HEADER.unpack_from(self.view, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(str(path) + " is not a compiled scenario of version " + str(VERSION))
+        self.skip(HEADER.size)
+
+        roads_start = self.position
+        self.node_names = self.take_names()
+        self.road_names = self.take_names()
+        self.road_a = self.take("i", self.roads)
+        self.road_b = self.take("i", self.roads)
+        self.road_normal = self.take("i", self.roads)
+        self.road_edge = self.take("i", self.roads)
+        self.roads_section = (roads_start, self.position) #what roads_hash hashes
+        self._roads_hash = None
+        self.road_cost = self.take("d", 3*self.roads)
+        self.edge_a = self.take("i", self.edges)
+        self.edge_b = self.take("i", self.edges)
+        self.offsets = self.take("i", self.nodes+1)
+        self.neighbors = self.take("i", 2*self.edges)
+        self.edge_ids = self.take("i", 2*self.edges)
+        self.predictions = self.take("B", self.prediction_days*self.roads)
+        self.actual = self.take("B", self.actual_days*self.roads)
+
+    @property
+    def roads_hash(self):
+        if self._roads_hash is None:
+            start, end = self.roads_section
+            self._roads_hash = hashlib.sha256(self.view[start:end])
+        return self._roads_hash
+
+    def skip(self, size): #move position forward by size bytes, and then to the next multiple of 8
+        self.position += size
+        self.position += -self.position % 8
+
+    def take(self, typecode, count): #a memoryview of count numbers of typecode starting at our position
+        size = array(typecode).itemsize
+        part = self.view[self.position:self.position+count*size]
+        self.skip(count*size)
+        if sys.byteorder != "little" and size > 1: #the file is little endian, so here we can not avoid a copy
+            values = array(typecode, part.tobytes())
+            values.byteswap()
+            part = memoryview(values)
+        else:
+            part = part.cast(typecode)
+        self.views.append(part)
+        return part
+
+    def take_names(self):
+        (size,) = struct.unpack_from("<I", self.view, self.position)
+        self.position += 4
+        names = self.view[self.position:self.position+size].tobytes().decode()
+        self.skip(size)
+        return names.split("\n") if size else []
+
+    def graph(self):
+        return CompiledGraph(self)
+
+    #release our memoryviews and close the map and the file. Everything we gave out (the arrays, graph()) can not be used after this
+    def close(self):
+        for view in self.views:
+            view.release()
+        self.view.release()
+        try:
+            self.map.close()
+        except BufferError: #a day row (a slice of the map) is still used somewhere, the map is closed when it is garbage collected
+            pass
+        self.file.close()
+
+    def day_row(self, matrix, days, day, section): #the traffic codes of every road for day (1, 2, ..), a slice of matrix
+        if not 1 <= day <= days:
+            raise IndexError("there is no day " + str(day) + " in the " + section + " of " + self.file.name)
+        return matrix[(day-1)*self.roads:day*self.roads]
+
+    def day_traffic(self, row): #(road ids, traffic codes) of the roads that have a traffic in row
+        if row.tobytes().find(MISSING) < 0: #every road is there, the row itself is the list of codes
+            return range(self.roads), row
+        roads = [road for road, traffic in enumerate(row) if traffic != MISSING]
+        return roads, [row[road] for road in roads]
+
+    def predictions_of(self, day):
+        return self.day_traffic(self.day_row(self.predictions, self.prediction_days, day, "predictions"))
+
+    def actual_of(self, day):
+        return self.day_traffic(self.day_row(self.actual, self.actual_days, day, "actual traffic"))
+
+"""
+    A Graph straight on the arrays of a compiled file: offsets, neighbors, edge_ids are the memoryviews of the file and edge_nodes looks up
+    edge_a, edge_b (no copy). ids and edge_index (the dictionaries of graph.py) are built the first time we use them.
+"""
+class CompiledGraph(Graph):
+    def __init__(self, scenario):
+        self.names = scenario.node_names
+        self.edge_nodes = EdgeNodes(scenario.edge_a, scenario.edge_b)
+        self.offsets = scenario.offsets
+        self.neighbors = scenario.neighbors
+        self.edge_ids = scenario.edge_ids
+        self._ids = None
+        self._edge_index = None
+
+    @property
+    def ids(self):
+        if self._ids is None:
+            self._ids = {name: node for node, name in enumerate(self.names)}
+        return self._ids
+
+    @property
+    def edge_index(self):
+        if self._edge_index is None:
+            self._edge_index = {nodes: edge for edge, nodes in enumerate(self.edge_nodes)}
+        return self._edge_index
+
+class EdgeNodes: #edge id -> (node id a, node id b) like Graph.edge_nodes, from the two arrays of the file
+    def __init__(self, edge_a, edge_b):
+        self.edge_a = edge_a
+        self.edge_b = edge_b
+
+    def __len__(self):
+        return len(self.edge_a)
+
+    def __getitem__(self, edge):
+        return self.edge_a[edge], self.edge_b[edge]
+
+    def __iter__(self):
+        return zip(self.edge_a, self.edge_b)
+
+if __name__ == "__main__":
+    compile_scenario(sys.argv[1], sys.argv[2])
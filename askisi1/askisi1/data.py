@@ -1,9 +1,15 @@
 from pathlib import Path
-from collections import defaultdict
-from decimal import Decimal
-from offline_algorithms import ucs, dijkstra_create_heuristic, ida_star
+from offline_algorithms import ucs, bidirectional_ucs, dijkstra_create_heuristic, ida_star, astar, LPAStar, shortest_path_tree, tree_path
+from graph import Graph
+from weights import WeightStore
+from jsonfile import save_json
+from traffic import LOW, NORMAL, HEAVY, TRAFFIC_NAME, traffic_code, road_costs, weight_in_heavy_traffic, weight_in_low_traffic
+import hashlib
+import json
 import random
 
+COMPILED_MAGIC = b"ASKISI1\x00" #the first bytes of a compiled scenario (compiled.MAGIC), we import compiled.py only for such files
+
 
 """
     A class used to modify, parse and store data from our files
@@ -15,40 +21,95 @@ import random
     file : file
         the file which is used to parse the source, destination, road info AND then all the daily predictions
     file_traff : file
-        the file which is used to parse the REAL traffic , the next day
+        the file which is used to parse the REAL traffic , the next day. Opened (and moved to <ActualTrafficPerDay>) the first time we read the
+        real traffic, see read_actual_traffic, so a run that never needs it never reads past the predictions
+    path : Path
+        the path of our scenario file
+    days : Dictionary
+        The byte offset of every <Day> of the predictions and of the actual traffic (see scenario_index.py), so we can seek to any day. 
+        Created the first time we need it (see day_offsets())
+    day_index_sidecar : bool
+        If True, days is saved next to the scenario file (and loaded from there in the next runs), and go_to_actual_traffic just seeks
+    scenario : CompiledScenario
+        If our file is a compiled scenario (see compiled.py) this is the memory mapped file and file, file_traff are None. Then we read no text at all,
+        every day is a slice of the mapped file. next_prediction_day, next_actual_day are the days parse_day_predictions() / parse_actual_traffic() 
+        read next, just like the position of file, file_traff for a text file.
     source : String
         our starting node
-    graph : Dictionary
-        Our dictionary of sets representing a graph with key = NodeA, value = set(NodeB,NodeG, ..) . Example: graph[NodeA] = (NodeB, NodeG, ..)
-    weight: Dictionary
-        My dictionary with key = set(NodeA, NodeB), value = (int) weight to go from NodeA to NodeB 
+    graph : Graph
+        Our CSR graph (see graph.py). Every node name is interned to an integer id and every pair of connected nodes (NodeA, NodeB) gets ONE
+        edge id, regardless of how many roads connect them. All the lists below that are "per edge" are indexed by this edge id.
+        Use edge(NodeA, NodeB) to get the edge id from node names.
+    weight: List
+        My list with index = edge id of (NodeA, NodeB), value = (int) weight to go from NodeA to NodeB 
         IMPORTAND: 
         Since we have many ways of connecting NodeA, NodeB in our graph (possibly many different roads), each day, based on the predictions
         I choose the cheapest path to connect NodeA, NodeB and this value is stored in this weight dictionary. Every day this weight might
         change because for example: the road with which we connected NodeA, NodeB the previous day, now has a prediction of "heavy" traffic and there is a cheaper road
         connecting these two nodes. EACH DAY the weight dictionary resets, and gets recreated based on our next days' predictions!
-    chosen_road: Dictionary
-        My dictionary with key = set(NodeA, NodeB), value = RoadA . The string value RoadA is the cheapest road we CHOSE the last day to connect these two nodes, 
-        which also corresponds to weight[NodeA, NodeB]. Each day the cheapest road gets chosen (based on predictions) to connect two nodes and the road name gets stored
-        in chosen_road[(. , .)], and the cost of traversing it gets stored in weight[(. , .)]. EACH DAY the chosen_road dictionary resets, and gets recreated based on our next days' predictions!
+        This list is weights.weight and is changed in place every day (never replaced), see WeightStore in weights.py
+    chosen_road: List
+        My list with index = edge id of (NodeA, NodeB), value = road id of RoadA . RoadA is the cheapest road we CHOSE the last day to connect these two nodes, 
+        which also corresponds to weight[NodeA, NodeB]. Each day the cheapest road gets chosen (based on predictions) to connect two nodes and the road id gets stored
+        in chosen_road[edge], and the cost of traversing it gets stored in weight[edge]. EACH DAY the chosen_road dictionary resets, and gets recreated based on our next days' predictions!
+        This list is weights.road
+    weights: WeightStore
+        The epoch stamped store behind weight and chosen_road (see weights.py). Starting a new day costs O(1), and it keeps the weight and chosen road of
+        every edge for every day that ended, so we can look at any past day (day_weights) or run our searches on it again (replay_day)
     road_info: Dictionary
-        All the road info we read in the first file lines. key = RoadA, value = (NodeA, NodeB, normal_cost) . RoadA is the String name of each rode, and (NodeA, NodeB, normal_cost)
-        is a set with the nodes that this RoadA connects, and the NORMAL cost of traversing it.
-    traffic_prediction: Dictionary
-        Each days' traffic predictions. key = RoadName, value = predictions (ex. "low")
-    real_traffic: Dictionary
-        Each days' real traffic. key = RoadName, value = traffic (ex. "low")
+        All the road info we read in the first file lines. key = RoadA, value = (NodeA, NodeB, normal_cost, edge) . RoadA is the String name of each rode, and (NodeA, NodeB, normal_cost, edge)
+        is a set with the nodes that this RoadA connects, the NORMAL cost of traversing it and the edge id of (NodeA, NodeB).
+    road_names: List
+        road id -> RoadName. The road id of a road is the position of its line in <Roads> (0, 1, 2, ...)
+    road_id: Dictionary
+        RoadName -> road id. For a compiled file road_info and road_id are built the first time we use them (see load_compiled)
+    road_edge: List
+        road id -> edge id of the two nodes the road connects
+    road_cost: List
+        road id -> (low cost, normal cost, heavy cost) . Created once when we parse the roads, so the cost of a road in some traffic is just
+        road_cost[road][traffic] (traffic is a code from traffic.py) and we never create Decimals again after that.
+    edge_roads: List
+        The multi-edge index, with index = edge id of (NodeA, NodeB), value = [road id of RoadA, road id of RoadB, ..] . All the parallel roads that
+        connect NodeA, NodeB (in any direction). With this we only look at the roads that actually connect two nodes, instead of searching road_info.
+        Built the first time we use it (only LRTA* needs it)
+    changed_edges: Set
+        The edge ids whose weight today is different from the previous day (see WeightStore.changed_edges), found by parse_day_predictions
+    lpa_star: LPAStar
+        Our incremental planner (see LPAStar in offline_algorithms.py), created on the first find_lpa_star_path() and kept across days
+    lpa_star_column: array
+        The weight column (see weights.py) of the last time lpa_star planned. find_lpa_star_path repairs it with the edges whose weight is
+        different now, so it is right after days we didnt call it, a replay_day or reading a day again (parse_day_predictions(day))
+    cch: CCH
+        Our customizable contraction hierarchy (see cch.py), preprocessed on the first find_cch_path() and kept for the whole run
+    cch_customized: bool
+        If cch has the weights of today. False every time the weights change, so the next find_cch_path() customizes it again
+    path_trees: Dictionary
+        The shortest path trees of today's weights (see find_batch_paths), key = root node id, value = (costs, parent). Emptied every time the weights change
+    traffic_prediction: List
+        Each days' traffic predictions. index = road id, value = traffic code (ex. LOW, see traffic.py), None if the road had no prediction
+    real_traffic: List
+        Each days' real traffic. index = road id, value = traffic code (ex. LOW), None if we didnt read it
     day: int
         What day it is
-    heuristic_help: Dictionary
-        This dictionary is used to create our heuristic dictionary and gets created once with key = set(NodeA, NodeB) , value = cheapest weight connecting them
+    heuristic_help: List
+        This list is used to create our heuristic list and gets created once with index = edge id of (NodeA, NodeB) , value = cheapest weight connecting them
         IMPORTAND:
         Cheapest weight connecting them means, that we take for every road the "low" cost , and FROM ALL those roads connecting NodeA, NodeB we store the CHEAPEST cost 
-        of connecting those two nodes. This is regardless of any prediction since we take "low" cost to ALL roads. This dictionary will be used to create our heuristic dictionary
-    heuristic: Dictionary
-        This is the heuristic dictionary with key = NodeA, value = cheapest cost to go from goal to nodeA . 
-        It is created with my dijkstra algorithm, finding the cheapest cost to go from goal to each node and storing this cost in heuristic dictionary. It uses the heuristic_help
-        dictionary aswell. See dijkstra_create_heuristic(graph, heuristic_help, goal) , in algorithms.py for more information.
+        of connecting those two nodes. This is regardless of any prediction since we take "low" cost to ALL roads. This list will be used to create our heuristic list
+        Created the first time we use it (see init_heuristic_help)
+    heuristic: List
+        This is the heuristic list with index = node id of NodeA, value = cheapest cost to go from goal to nodeA . 
+        It is created with my dijkstra algorithm, finding the cheapest cost to go from goal to each node and storing this cost in heuristic list. It uses the heuristic_help
+        list aswell. See dijkstra_create_heuristic(graph, heuristic_help, goal) , in algorithms.py for more information.
+        Created the first time we use it (IDA*, A*, LPA*, LRTA*), see init_heuristic, so a run with only UCS never runs (or loads) that dijkstra.
+    landmarks: Landmarks
+        The ALT landmarks over heuristic_help (see landmarks.py), so A*/IDA* can have a heuristic for ANY destination. Created by init_landmarks()
+    heuristic_cache: Path
+        The folder where we save our heuristic list after computing it, or None to never use a cache. The file name is a hash of the
+        <Roads> section and the destination (see heuristic_cache_file()), so if we run again on the same network we just load it and skip dijkstra.
+    roads_hash: hashlib object
+        The sha256 of every line of the <Roads> section. Computed the first time we need it (the heuristic cache, the memory of LRTA*), so
+        a run without them never hashes the roads. roads_offset is where the <Roads> lines start in our file, so we can read them again then
     p1: float
         This is the probability of making a CORRECT prediction
     p2: float
@@ -60,164 +121,435 @@ import random
 """
 #https://codereview.stackexchange.com/questions/163414/adjacency-list-graph-representation-on-python
 class Data:
-    def __init__(self, filename):
+    #heuristic_cache = True (default cache folder), a folder, or False/None for no cache. day_index_sidecar, see scenario_index.py
+    def __init__(self, filename, heuristic_cache=True, day_index_sidecar=False):
         #https://stackoverflow.com/questions/40416072/reading-file-using-relative-path-in-python-project
-        self.file = open(Path(__file__).parent  / ("../data/"+filename), "r")
-        self.file_traff = open(Path(__file__).parent  / ("../data/"+filename), "r") #file_predictions, file_pred is used to read the real traffic
+        self.path = Path(__file__).parent  / ("../data/"+filename)
+        self.scenario = None
+        self.file = None
+        self.file_traff = None
+        with open(self.path, "rb") as f:
+            magic = f.read(len(COMPILED_MAGIC))
+        if magic == COMPILED_MAGIC:
+            import compiled #only compiled scenarios need it
+            self.scenario = compiled.CompiledScenario(self.path)
+        else:
+            self.file = open(self.path, "r")
+        self.next_prediction_day = 1
+        self.next_actual_day = 1
+        self.days = None
+        self.day_index_sidecar = day_index_sidecar
 
         self.source = ""
         self.destination = ""
-        self.graph = defaultdict(set) #dictionary with key=Node , value={AdjacentNode1, AdjacentNode2, ...}
-        self.weight = {} #dictionary with key=(Node1, Node2), value=weight
-        self.chosen_road = {} #dictionary with the chosen road connecting two nodes each day (cheapest) chosen_road(NodeA, NodeB) = cheapest road
-        self.road_info = {} #dictionary with key="RoadName1" , value=(Node20,Node30, normal weight)
-        self.traffic_prediction = {} #predictions
-        self.real_traffic = {} #actual daily traffic
+        self.graph = Graph() #CSR graph over integer node ids, see graph.py
+        self.weight = [] #list with index=edge id of (Node1, Node2), value=weight
+        self.chosen_road = [] #list with the chosen road (id) connecting two nodes each day (cheapest) chosen_road[edge(NodeA, NodeB)] = cheapest road
+        self._road_info = {} #dictionary with key="RoadName1" , value=(Node20,Node30, normal weight, edge id), see the road_info property
+        self._edge_roads = None #list with index=edge id of (Node1, Node2), value=[road id 1, road id 2, ..] all the roads connecting them
+        self.road_names = [] #road id -> "RoadName1"
+        self._road_id = {} #"RoadName1" -> road id, see the road_id property
+        self.road_edge = [] #road id -> edge id
+        self.road_cost = [] #road id -> (low cost, normal cost, heavy cost)
+        self.batch = None #numpy arrays of parse_day_predictions_batched, created the first time we use it
+        self.weights = None #WeightStore behind weight and chosen_road (see weights.py), created by init_edges
+        self.changed_edges = set() #edge ids whose weight changed from yesterday
+        self.lpa_star = None
+        self.lpa_star_column = None
+        self.path_trees = {}
+        self.cch = None
+        self.cch_customized = False
+        self.traffic_prediction = [] #predictions, index = road id
+        self.real_traffic = [] #actual daily traffic, index = road id
         self.day = 1
 
-        self.heuristic_help = {}
-        self.heuristic = {}
+        self._heuristic_help = None #see the heuristic_help and heuristic properties
+        self._heuristic = None
+        self.landmarks = None
+        if heuristic_cache is True:
+            heuristic_cache = Path(__file__).parent / "../data/.heuristic_cache"
+        self.heuristic_cache = Path(heuristic_cache) if heuristic_cache else None
+        self._roads_hash = None #see the roads_hash property
+        self.roads_offset = None
 
         self.p1 = 0.6 #this is the chance of making the RIGHT prediction
         self.p2 = 0.2 #this is the chance of overestimaton of cost
         self.p3 = 0.2 #this is the chance of underestimation of cost
         
-        self.parse_source()  #parse the source vertex
-        self.parse_destination() #parse the destination vertex
-        self.parse_roads() #parse all info about roads
-        self.file.readline() #skip a line
-        
-        self.init_heuristic() #create our heuristic function (created by dijkstra) to be used by IDA* algorithm
+        if self.scenario is not None:
+            self.load_compiled() #everything parse_source, parse_destination, parse_roads do, from the compiled file
+        else:
+            self.parse_source()  #parse the source vertex
+            self.parse_destination() #parse the destination vertex
+            self.parse_roads() #parse all info about roads
+            self.file.readline() #skip a line
+        #the heuristic and the position of the real traffic are found when we first need them, see heuristic and read_actual_traffic
+
+    @property
+    def heuristic_help(self):
+        if self._heuristic_help is None:
+            self.init_heuristic_help()
+        return self._heuristic_help
+
+    @property
+    def heuristic(self): #our heuristic function (created by dijkstra) to be used by IDA*, A*, LPA* and LRTA*
+        if self._heuristic is None:
+            self.init_heuristic()
+        return self._heuristic
+
+    @heuristic.setter
+    def heuristic(self, heuristic):
+        self._heuristic = heuristic
 
-        self.go_to_actual_traffic() #move file_traff (open file) to be ready to parse real daily traffic
-        
     def go_to_actual_traffic(self):
+        if self.day_index_sidecar: #we (probably) have the offsets saved already, so no need to read the whole predictions
+            actual = self.day_offsets()["actual"]
+            if actual:
+                self.file_traff.seek(actual[0])
+                return
         while(self.file_traff.readline().strip() != "<ActualTrafficPerDay>"):
             pass
 
+    def day_offsets(self): #the offsets of every <Day>, see scenario_index.py
+        if self.days is None:
+            import scenario_index #only if we seek
+            self.days = scenario_index.day_index(self.path, self.day_index_sidecar)
+        return self.days
+
+    def seek_day(self, file, section, day): #move file to the <Day> line of day (1, 2, ..) of section ("predictions" or "actual")
+        offsets = self.day_offsets()[section]
+        if not 1 <= day <= len(offsets):
+            raise IndexError("there is no day " + str(day) + " in the " + section + " of " + str(self.path))
+        file.seek(offsets[day-1])
+
     def parse_source(self):
         self.source = self.file.readline().replace("<Source>", "").replace("</Source>", "").strip()
     
     def parse_destination(self):
         self.destination = self.file.readline().replace("<Destination>", "").replace("</Destination>", "").strip()
     
-    def parse_actual_traffic(self):
-        self.file_traff.readline()
-        line = self.file_traff.readline().strip()
+    #day = None reads the next day, or else we seek to that day first (1, 2, ..). block = the (road ids, traffic codes) of the day if we
+    #already read them with read_actual_traffic (see pipeline.py), then we dont touch the file at all
+    def parse_actual_traffic(self, day=None, block=None):
+        roads, traffic = block if block is not None else self.read_actual_traffic(day)
+        for road, code in zip(roads, traffic):
+            self.real_traffic[road] = code
+
+    def read_actual_traffic(self, day=None): #only the reading part of parse_actual_traffic: (road ids, traffic codes) of the day
+        if self.scenario is not None:
+            if day is None:
+                day = self.next_actual_day
+            self.next_actual_day = day+1
+            return self.scenario.actual_of(day)
+        if self.file_traff is None: #the first time: open the file and (if we read the next day) move it to the real traffic
+            self.file_traff = open(self.path, "r")
+            if day is None:
+                self.go_to_actual_traffic()
+        if day is not None:
+            self.seek_day(self.file_traff, "actual", day)
+        return self.read_day(self.file_traff)
+
+    def read_predictions(self, day=None): #only the reading part of parse_day_predictions: (road ids, traffic codes) of the day
+        if self.scenario is not None:
+            if day is None:
+                day = self.next_prediction_day
+            self.next_prediction_day = day+1
+            return self.scenario.predictions_of(day) #a slice of the mapped file, no text at all
+        if day is not None:
+            self.seek_day(self.file, "predictions", day)
+        return self.read_day(self.file)
+
+    def read_day(self, file): #read a <Day> .. </Day> block of file, return (road ids, traffic codes) in the order of the lines
+        file.readline()
+        roads = []
+        traffic = []
+        road_id = self.road_id
+        line = file.readline().strip()
         while(line != "</Day>"):
             tmp = line.replace(" ", "").split(";")
-            self.real_traffic[tmp[0]] = tmp[1]
-            line = self.file_traff.readline().strip()
+            roads.append(road_id[tmp[0]])
+            traffic.append(traffic_code(tmp[1]))
+            line = file.readline().strip()
+        return roads, traffic
             
     def parse_roads(self):
         self.file.readline()
+        self.roads_offset = self.file.tell()
         line = self.file.readline().strip()
         while(line != "</Roads>"):
             tmp = line.replace(" ", "").split(";")
-            #(Note: sets cant have duplicate values so we are good)
-            self.graph[tmp[1]].add(tmp[2])
-            self.graph[tmp[2]].add(tmp[1])
+            #intern both node names and get the ONE edge id connecting them (parallel roads share it)
+            edge = self.graph.add_edge(self.graph.intern(tmp[1]), self.graph.intern(tmp[2]))
 
-            #create weights so that weight[Node1, Node2] = weight[Node2, Node1] and we will fix weights from predictions
-            self.weight[tmp[1],tmp[2]] = None
-            self.weight[tmp[2],tmp[1]] = None
+            #create road so that road["RoadName"] = (Node20, Node30, normal weight, edge id)
+            self.road_info[tmp[0]] = tmp[1],tmp[2],int(tmp[3]),edge
+            self.road_id[tmp[0]] = len(self.road_names)
+            self.road_names.append(tmp[0])
+            self.road_edge.append(edge)
+            self.road_cost.append(road_costs(int(tmp[3]))) #index LOW, NORMAL, HEAVY
+            line = self.file.readline().strip()
 
-            #create road weights so that chosen_road[Node1, Node2] = RoadA which is the chosen road each day connecting two nodes
-            self.chosen_road[tmp[2],tmp[1]] = None
-            self.chosen_road[tmp[1],tmp[2]] = None
+        self.graph.build() #create the CSR adjacency once, now that we know every edge
+        self.init_edges()
 
-            self.heuristic_help[tmp[2],tmp[1]] = None
-            self.heuristic_help[tmp[1],tmp[2]] = None
+    """
+    The same as parse_source, parse_destination and parse_roads, but everything comes ready from the compiled file.
+    graph (see compiled.CompiledGraph) and road_edge index the memoryviews of the mapped file, and the dictionaries of names (road_info, road_id,
+    graph.ids, graph.edge_index) are only built the first time we use them. The ONE copy we make here is road_cost, a list of
+    (low, normal, heavy) tuples, because prediction_weight reads road_cost[road][traffic] for every road every day.
+    """
+    def load_compiled(self):
+        scenario = self.scenario
+        self.graph = scenario.graph()
+        self.source = scenario.node_names[scenario.source]
+        self.destination = scenario.node_names[scenario.destination]
+        self.road_names = scenario.road_names
+        self._road_id = self._road_info = None
+        self.road_edge = scenario.road_edge
+        cost = scenario.road_cost
+        self.road_cost = list(zip(cost[0::3], scenario.road_normal, cost[2::3])) #the normal cost from the int array, like road_costs() gives it
+        self.init_edges()
 
+    @property
+    def road_id(self):
+        if self._road_id is None:
+            self._road_id = {road: i for i, road in enumerate(self.road_names)}
+        return self._road_id
 
-            #create road so that road["RoadName"] = (Node20, Node30, normal weight)
-            self.road_info[tmp[0]] = tmp[1],tmp[2],int(tmp[3])
-            line = self.file.readline().strip()
+    @property
+    def road_info(self):
+        if self._road_info is None:
+            scenario, names = self.scenario, self.graph.names
+            self._road_info = {road: (names[node_a], names[node_b], normal, edge) for road, node_a, node_b, normal, edge in
+                zip(self.road_names, scenario.road_a, scenario.road_b, scenario.road_normal, scenario.road_edge)}
+        return self._road_info
 
-    def parse_day_predictions(self):
-        self.file.readline()
-        line = self.file.readline().strip()
+    @property
+    def edge_roads(self):
+        if self._edge_roads is None:
+            self._edge_roads = [[] for _ in range(self.graph.number_of_edges())]
+            for road, edge in enumerate(self.road_edge):
+                self._edge_roads[edge].append(road)
+        return self._edge_roads
 
-        while(line != "</Day>"):
-            tmp = line.replace(" ", "").split(";")
+    def close(self): #close our files (and the mapped file of a compiled scenario), this Data can not read anything after this
+        for file in (self.file, self.file_traff):
+            if file is not None:
+                file.close()
+        if self.scenario is not None:
+            self.scenario.close()
 
-            self.traffic_prediction[tmp[0]] = tmp[1]
-            nodes = self.road_info[tmp[0]][0:2]  #means nodes = road_info["Road1"][0:2] = (Node1, Node2)
-            new_weight = self.prediction_weight(tmp[1], tmp[0])
+    def init_edges(self): #create all our per edge (and per road) lists, once we know the graph and the roads
+        #one slot per edge so that weight[edge] is the same for both directions and we will fix weights from predictions
+        self.weights = WeightStore(self.graph.number_of_edges())
+        self.weight = self.weights.weight
+        #chosen_road[edge] = RoadA which is the chosen road each day connecting two nodes
+        self.chosen_road = self.weights.road
+        self._edge_roads = None #see the edge_roads property
+
+        self.traffic_prediction = [None]*len(self.road_names)
+        self.real_traffic = [None]*len(self.road_names)
+
+    #day = None reads the next day, or else we seek to that day first (1, 2, ..). batched = True to do the whole day at once with numpy, see parse_day_predictions_batched
+    #block = the (road ids, traffic codes) of the day if we already read them with read_predictions (see pipeline.py)
+    def parse_day_predictions(self, day=None, batched=False, block=None):
+        roads, traffic = block if block is not None else self.read_predictions(day)
+        if batched:
+            return self.parse_day_predictions_batched(roads, traffic)
+
+        weight, chosen_road, stamp, epoch = self.weight, self.chosen_road, self.weights.stamp, self.weights.epoch
+        for road, code in zip(roads, traffic):
+            self.traffic_prediction[road] = code
+            edge = self.road_edge[road]  #means edge = edge id of (Node1, Node2) that "Road1" connects
+            new_weight = self.prediction_weight(code, road)
 
             #here we check whether the new weight depending on heavy, low or normal should be placed
-            #in our weight dictionary. The weight dictionary is initialized with null weights
-            #so if our new_weight is < the old weight (or the old wieght is null) then replace 
+            #in our weight list. An edge is not set today if its stamp is not today's epoch (see weights.py)
+            #so if our new_weight is < the old weight (or the edge is not set yet) then replace 
             #because we always want to keep the cheapest path from NodeA->NodeB regardless
-            if(self.weight[nodes] == None or self.weight[nodes] > new_weight):
+            if(stamp[edge] != epoch or weight[edge] > new_weight):
                 #cheapest weight from nodeA to nodeB
-                self.weight[nodes] = new_weight
-                self.weight[nodes[1],nodes[0]] = new_weight
+                weight[edge] = new_weight
                 #cheapest road from nodeA to nodeB
-                self.chosen_road[nodes] = tmp[0]
-                self.chosen_road[nodes[1],nodes[0]] = tmp[0]
-            line = self.file.readline().strip()
+                chosen_road[edge] = road
+                stamp[edge] = epoch
+        self.weights.seal() #None for the edges without a road today
+        return self.find_changed_edges()
+
+    """
+    Same as parse_day_predictions, but for the whole day at once with numpy (see vectorized.py): we turn the road ids and traffic codes of the day
+    into arrays, draw ALL the random numbers of the day with one call, find every road's cost with array indexing and
+    the cheapest road of every edge with a scatter-min. Only the reading of the lines (of a text file) is still done one by one.
+    The day stays in arrays until the end: the weights go to our store (and the changed edges are found) straight from them, see WeightStore.load,
+    and the predictions of a day with every road in order are one slice assignment.
+    The random numbers come from a numpy generator seeded from python's random the first time, so random.seed() makes this reproducible too
+    (but not the same numbers as the one by one version).
+    """
+    def parse_day_predictions_batched(self, road_list, traffic_list):
+        import vectorized #numpy is only needed for this
+        np = vectorized.np
+        if self.batch is None: #arrays we need every day, created once
+            self.batch = {
+                "costs": np.array(self.road_cost, dtype=np.float64).reshape(-1, 3),
+                "road_edge": np.array(self.road_edge, dtype=np.int64),
+                "random": np.random.default_rng(random.getrandbits(64)),
+            }
+
+        roads = vectorized.as_array(road_list, np.int64)
+        traffic = vectorized.as_array(traffic_list, np.int64)
+        if len(roads) == len(self.traffic_prediction) and np.array_equal(roads, np.arange(len(roads))): #every road, in order
+            self.traffic_prediction[:] = traffic.tolist()
+        else:
+            for road, code in zip(roads.tolist(), traffic.tolist()):
+                self.traffic_prediction[road] = code
+        rand = self.batch["random"].random(len(roads))
+
+        cost = vectorized.predicted_costs(self.batch["costs"], roads, traffic, rand, self.p1, self.p2)
+        weight, chosen = vectorized.cheapest_per_edge(self.batch["road_edge"], roads, cost, self.graph.number_of_edges())
+
+        self.weights.load(weight, np.where(chosen < 0, -1, roads[chosen]).astype(np.int32))
+        return self.find_changed_edges()
+
+    #the edges whose weight changed since yesterday (our incremental planner finds its own changes, see find_lpa_star_path)
+    def find_changed_edges(self):
+        self.changed_edges = self.weights.changed_edges()
+        self.path_trees = {}
+        self.cch_customized = False
+        return self.changed_edges
             
-    def prediction_weight(self, traffic, road): #return the new weight based on our propabilities p1,p2,p3
+    def prediction_weight(self, traffic, road): #return the new weight based on our propabilities p1,p2,p3 (traffic is a code, road a road id)
         rand = random.random() #random number between 0-1
+        cost = self.road_cost[road] #(low, normal, heavy) cost of the road
 
-        if (traffic == "low"):
+        if (traffic == LOW):
             if(rand <= self.p1): #then choose our prediction
-                return self.weight_in_low_traffic(self.road_info[road][2]) #road_info["Road1"][3] = normal weight, and we return low traffic weight
+                return cost[LOW] #we return low traffic weight
             elif(rand <= (self.p1+self.p2)): #p2 : overestimation of cost, so low -> low
-                return self.weight_in_low_traffic(self.road_info[road][2]) #we return low traffic weight
+                return cost[LOW] #we return low traffic weight
             else: #p3 : underestimation of cost
-                return self.road_info[road][2] #we return normal traffic weight
-        elif(traffic == "heavy"):
+                return cost[NORMAL] #we return normal traffic weight
+        elif(traffic == HEAVY):
             if(rand <= self.p1): #then choose our prediction
-                return self.weight_in_heavy_traffic(self.road_info[road][2]) #road_info["Road1"][3] = normal weight, and we return heavy traffic weight
+                return cost[HEAVY] #we return heavy traffic weight
             elif(rand <= (self.p1+self.p2)): #p2 : overestimation of cost, so heavy -> normal
-                return self.road_info[road][2] #we return normal traffic weight
+                return cost[NORMAL] #we return normal traffic weight
             else: #p3: underestimation of cost so heavy -> heavy
-                return self.weight_in_heavy_traffic(self.road_info[road][2]) #we return heavy traffic weight
+                return cost[HEAVY] #we return heavy traffic weight
         else:
             if(rand <= self.p1): #then choose our prediction
-                return self.road_info[road][2] #return normal weight
+                return cost[NORMAL] #return normal weight
             elif(rand <= (self.p1+self.p2)): #p2 : overestimation of cost, so normal -> low
-                return self.weight_in_low_traffic(self.road_info[road][2]) #we return low traffic weight
+                return cost[LOW] #we return low traffic weight
             else: #p3: underestimation of cost so normal -> heavy
-                return self.weight_in_heavy_traffic(self.road_info[road][2]) #we return heavy traffic weight
+                return cost[HEAVY] #we return heavy traffic weight
 
+    #road_cost has these for every road already, see road_costs in traffic.py
     def weight_in_heavy_traffic(self, number): 
-        return float(Decimal(number)*Decimal(1.25))
+        return weight_in_heavy_traffic(number)
     def weight_in_low_traffic(self, number): 
-        return float(Decimal(number)*Decimal(0.9))
+        return weight_in_low_traffic(number)
 
-    def reset_weight_road(self):
-        for key in self.chosen_road:
-            self.chosen_road[key] = None
+    def reset_weight(self): #O(1): every edge is "unset" until the predictions of the next day set it (see weights.py)
+        self.weights.new_day()
 
-    def reset_weight(self):
-        for key in self.weight:
-            self.weight[key] = None
-    
-    def find_ucs_path(self):
-        return ucs(self.graph, self.weight, self.source, self.destination)
+    def edge(self, node_a, node_b): #edge id connecting the node NAMES node_a, node_b
+        return self.graph.edge(self.graph.ids[node_a], self.graph.ids[node_b])
+
+    #the searches run on node ids, we translate to node names only for the returned path
+    #heap = "lazy" or "indexed", see ucs in offline_algorithms.py. bidirectional = True to meet in the middle, see bidirectional_ucs
+    def find_ucs_path(self, heap="lazy", stats=None, bidirectional=False):
+        ids = self.graph.ids
+        if bidirectional:
+            search_time, visited_nodes, cost, path = bidirectional_ucs(self.graph, self.weight, ids[self.source], ids[self.destination], stats)
+        else:
+            search_time, visited_nodes, cost, path = ucs(self.graph, self.weight, ids[self.source], ids[self.destination], heap, stats)
+        return search_time, visited_nodes, cost, self.graph.to_names(path)
     
-    def find_ida_star_path(self):
-        return ida_star(self.graph, self.weight, self.heuristic, self.source, self.destination)
+    #A* with our heuristic and the daily weights, see astar in offline_algorithms.py. landmarks = True to use the landmark heuristic instead,
+    #which is valid for any destination (so we can change self.destination without a new dijkstra)
+    def find_astar_path(self, stats=None, landmarks=False):
+        ids = self.graph.ids
+        search_time, visited_nodes, cost, path = astar(self.graph, self.weight, self.heuristic_for(landmarks), ids[self.source], ids[self.destination],
+            stats)
+        return search_time, visited_nodes, cost, self.graph.to_names(path)
+
+    #keeps its search from the last time it planned and repairs it with the edges whose weight is different now (not "since yesterday", since
+    #we can replay or read again any day in between), visited_nodes = nodes reprocessed today
+    def find_lpa_star_path(self, stats=None):
+        ids = self.graph.ids
+        if self.weights.column is None: #a day without predictions (yet), every edge is unset
+            self.weights.seal()
+        if self.lpa_star is None: #a new planner starts from scratch, it has no changes to repair
+            self.lpa_star = LPAStar(self.graph, self.heuristic, ids[self.source], ids[self.destination])
+            self.lpa_star.update(self.weight, ())
+        else:
+            self.lpa_star.update(self.weight, self.weights.changed_edges(self.lpa_star_column))
+        self.lpa_star_column = self.weights.column #never changed in place, a new day (or a replay) gets a new column
+        search_time, visited_nodes, cost, path = self.lpa_star.search(stats)
+        return search_time, visited_nodes, cost, self.graph.to_names(path)
+
+    #query our contraction hierarchy (see cch.py). The preprocessing happens once, the customization once per day (its time is added to the first query),
+    #and the customization costs far more than one ucs, so this is only worth it with many queries per day. batched = True customizes with numpy
+    def find_cch_path(self, batched=False, stats=None):
+        from cch import CCH
+        ids = self.graph.ids
+        customize_time = 0
+        if self.cch is None:
+            self.cch = CCH(self.graph)
+        if not self.cch_customized:
+            customize_time = self.cch.customize(self.weight, batched)
+            self.cch_customized = True
+        search_time, visited_nodes, cost, path = self.cch.query(ids[self.source], ids[self.destination], stats)
+        return customize_time+search_time, visited_nodes, cost, self.graph.to_names(path)
+
+    #see IDAStar in offline_algorithms.py for transposition_size, threshold_factor and threshold_bucket
+    def find_ida_star_path(self, transposition_size=0, threshold_factor=1.0, threshold_bucket=0, landmarks=False, stats=None):
+        ids = self.graph.ids
+        search_time, visited_nodes, cost, path = ida_star(self.graph, self.weight, self.heuristic_for(landmarks), ids[self.source], ids[self.destination],
+            transposition_size, threshold_factor, threshold_bucket, stats)
+        return search_time, visited_nodes, cost, self.graph.to_names(path)
     
+    """
+    Many routes at once with today's weights. queries = [(source name, destination name), ..]
+    Instead of one search per query, we group the queries by destination (or by source, with by="source") and build ONE shortest path tree
+    for each distinct one (see shortest_path_tree in offline_algorithms.py). Every query is then just a walk up its tree.
+    The trees are kept in path_trees until the weights change, so more calls on the same day reuse them.
+    Returns (search_time, trees, results): the time spent building trees, how many we built, and [(cost, path), ..] in the order of queries
+    (cost = math.inf and path = [] if there is no route).
+    """
+    def find_batch_paths(self, queries, by="destination"):
+        if by not in ("destination", "source"):
+            raise ValueError("unknown by: " + str(by))
+        ids = self.graph.ids
+        search_time = 0
+        trees = 0
+        results = []
+        for source, destination in queries:
+            source, destination = ids[source], ids[destination]
+            root, node = (destination, source) if by == "destination" else (source, destination)
+            if root not in self.path_trees:
+                tree_time, costs, parent = shortest_path_tree(self.graph, self.weight, root)
+                self.path_trees[root] = costs, parent
+                search_time += tree_time
+                trees += 1
+            costs, parent = self.path_trees[root]
+            path = tree_path(parent, root, node) #node -> .. -> root
+            if by == "source":
+                path.reverse()
+            results.append((costs[node], self.graph.to_names(path)))
+        return search_time, trees, results
+
     def predicted_path_cost(self, path):
         cost = 0
         for i in range(len(path)-1):
-            cost += self.weight[path[i],path[i+1]]
+            cost += self.weight[self.edge(path[i],path[i+1])]
         return cost
         
     def find_real_cost(self, path):
         cost = 0
         for i in range(len(path)-1):
-            road = self.chosen_road[path[i], path[i+1]] #get chosen road (connecting the path nodes) from our chosen_road dictionary
-            if(self.real_traffic[road] == "heavy"):  #check according to the traffic each day what was the actual cost of using those roads
-                cost += self.weight_in_heavy_traffic(self.road_info[road][2])
-            elif(self.real_traffic[road] == "low"): #check according to the traffic each day what was the actual cost of using those roads
-                cost += self.weight_in_low_traffic(self.road_info[road][2])
-            else: #check according to the traffic each day what was the actual cost of using those roads
-                cost += self.road_info[road][2]
+            road = self.chosen_road[self.edge(path[i], path[i+1])] #get chosen road (connecting the path nodes) from our chosen_road list
+            cost += self.road_cost[road][self.real_traffic[road]] #check according to the traffic each day what was the actual cost of using those roads
         return cost
         
     #BIG NOUS
@@ -231,26 +563,28 @@ class Data:
         count_p2 = 0
         count_p3 = 0
         count_roads = 0
-        for road in self.traffic_prediction:
+        for road, predicted in enumerate(self.traffic_prediction):
+            if predicted is None: #no prediction for this road
+                continue
             count_roads += 1
-            if(self.traffic_prediction[road] == "low"):
-                if(self.real_traffic[road] == "low"): #prediction correct
+            if(predicted == LOW):
+                if(self.real_traffic[road] == LOW): #prediction correct
                     count_p1 += 1
-                elif(self.real_traffic[road] == "heavy"): #cost was underestimated
+                elif(self.real_traffic[road] == HEAVY): #cost was underestimated
                     count_p3 += 1 
                 else: #cost was underestimated
                     count_p3 += 1 
-            elif(self.traffic_prediction[road] == "heavy"):
-                if(self.real_traffic[road] == "heavy"): #prediction correct
+            elif(predicted == HEAVY):
+                if(self.real_traffic[road] == HEAVY): #prediction correct
                     count_p1 += 1
-                elif(self.real_traffic[road] == "low"): #cost was overestimated
+                elif(self.real_traffic[road] == LOW): #cost was overestimated
                     count_p2 += 1
                 else: #cost was overestimated
                     count_p2 += 1
             else:
-                if(self.real_traffic[road] == "normal"): #prediction correct
+                if(self.real_traffic[road] == NORMAL): #prediction correct
                     count_p1 += 1
-                elif(self.real_traffic[road] == "heavy"): #cost was underestimated
+                elif(self.real_traffic[road] == HEAVY): #cost was underestimated
                     count_p3 += 1
                 else: #cost was overestimated
                     count_p2 += 1
@@ -264,21 +598,90 @@ class Data:
         self.p3 = self.p3*(self.day/(self.day+1))+new_p3/(self.day+1)
 
     def next_day(self):
+        self.weights.end_day(self.day) #keep today in the history, it is also what find_changed_edges compares tomorrow with
         self.reset_weight()
-        self.reset_weight_road()
+        self.path_trees = {}
+        self.cch_customized = False
         self.day += 1
     
+    def day_weights(self, day): #(weight list, chosen road list) of a day that ended, see WeightStore.day
+        return self.weights.day(day)
+
+    #make the weights of a past day today's weights again, so we can run any search on that day without parsing it or drawing random numbers
+    def replay_day(self, day):
+        self.weights.restore(day)
+        return self.find_changed_edges()
+
     #heuristic_help : connect two nodes with the cheapest low traffic cost that can exist in our graph (regardless of predictions)
     #will be used to create our heuristic later
+    def init_heuristic_help(self):
+        heuristic_help = [None]*self.graph.number_of_edges()
+        for road, edge in enumerate(self.road_edge): 
+            cost = self.road_cost[road][LOW]
+            if(heuristic_help[edge] == None or heuristic_help[edge] > cost):
+                heuristic_help[edge] = cost
+        self._heuristic_help = heuristic_help
+
     def init_heuristic(self):
-        for road in self.road_info: 
-            node_a, node_b = self.road_info[road][0:2]
-            cost = self.road_info[road][2]
-            if(self.heuristic_help[node_a,node_b] == None or self.heuristic_help[node_a,node_b] > self.weight_in_low_traffic(cost)):
-                self.heuristic_help[node_a,node_b] = self.weight_in_low_traffic(cost)
-                self.heuristic_help[node_b,node_a] = self.weight_in_low_traffic(cost)
-
-        self.heuristic = dijkstra_create_heuristic(self.graph, self.heuristic_help, self.destination)
+        if self.load_heuristic_cache(): #same network and destination as a previous run
+            return
+        self.heuristic = dijkstra_create_heuristic(self.graph, self.heuristic_help, self.graph.ids[self.destination])
+        self.save_heuristic_cache()
+
+    #k landmarks picked with selection ("farthest" or "avoid"), see landmarks.py. k dijkstras, once, for every destination
+    def init_landmarks(self, k=8, selection="farthest"):
+        from landmarks import Landmarks
+        self.landmarks = Landmarks(self.graph, self.heuristic_help, k, selection)
+
+    def heuristic_for(self, landmarks=False): #our heuristic list, or the landmark heuristic of the current destination
+        if not landmarks:
+            return self.heuristic
+        if self.landmarks is None:
+            self.init_landmarks()
+        return self.landmarks.heuristic(self.graph.ids[self.destination])
+
+    @property
+    def roads_hash(self):
+        if self._roads_hash is None:
+            if self.scenario is not None:
+                self._roads_hash = self.scenario.roads_hash
+            else:
+                self._roads_hash = self.hash_roads()
+        return self._roads_hash
+
+    def hash_roads(self): #read the <Roads> lines of our file again (from roads_offset) and hash them
+        roads_hash = hashlib.sha256()
+        with open(self.path, "r") as f:
+            f.seek(self.roads_offset)
+            line = f.readline().strip()
+            while(line != "</Roads>"):
+                roads_hash.update(line.encode())
+                roads_hash.update(b"\n")
+                line = f.readline().strip()
+        return roads_hash
+
+    def heuristic_cache_file(self): #the cache file name is the hash of our <Roads> section AND the destination
+        key = self.roads_hash.copy()
+        key.update(b"<Destination>" + self.destination.encode())
+        return self.heuristic_cache / (key.hexdigest() + ".json")
+
+    def load_heuristic_cache(self): #return True if we loaded the heuristic from the cache
+        if self.heuristic_cache is None:
+            return False
+        try:
+            with open(self.heuristic_cache_file(), "r") as f:
+                heuristic = json.load(f)
+        except (OSError, ValueError): #no cache file yet (or a broken one), so we have to compute it
+            return False
+        if len(heuristic) != len(self.graph):
+            return False
+        self.heuristic = heuristic
+        return True
+
+    def save_heuristic_cache(self):
+        if self.heuristic_cache is None:
+            return
+        save_json(self.heuristic_cache_file(), self.heuristic) #the cache is only an optimization, if we can not save it we compute it again next time
     
     """
     Down here are all the print tests ive used to make sure my code is running well and as intended. No use reading it.
@@ -295,33 +698,34 @@ class Data:
     def print_heuristic(self):
         print()
         print("________HEURISTIC_________")
-        for node in self.heuristic:
-            print(node, self.heuristic[node])
+        for node, cost in enumerate(self.heuristic):
+            print(self.graph.names[node], cost)
         print()
 
     def print_heuristic_help(self):
         print()
         print("________HEURISTIC HELP_________")
-        for nodes in self.heuristic_help:
-            print(nodes, self.heuristic_help[nodes])
+        for edge, (node_a, node_b) in enumerate(self.graph.edge_nodes):
+            print((self.graph.names[node_a], self.graph.names[node_b]), self.heuristic_help[edge])
         print()
     def print_graph(self):
         print()
         print("________GRAPH_________")
-        for node in self.graph:
-            print(node, ":", self.graph[node])
+        for node, name in enumerate(self.graph.names):
+            print(name, ":", set(self.graph.to_names(neighbor for neighbor, _ in self.graph.adjacent(node))))
         print()
     def print_weight(self):
         print()
         print("________WEIGHT_________")
-        for node1, node2 in self.weight:
-            print((node1,node2) , ":", self.weight[node1,node2])
+        for edge, (node1, node2) in enumerate(self.graph.edge_nodes):
+            print((self.graph.names[node1],self.graph.names[node2]) , ":", self.weight[edge])
         print()
     def print_road_weight(self):
         print()
         print("________CHOSEN ROAD_________")
-        for node1, node2 in self.chosen_road:
-            print((node1,node2) , ":", self.chosen_road[node1,node2])
+        for edge, (node1, node2) in enumerate(self.graph.edge_nodes):
+            road = self.chosen_road[edge]
+            print((self.graph.names[node1],self.graph.names[node2]) , ":", None if road is None else self.road_names[road])
         print()
     def print_road_info(self):
         print()    
@@ -332,8 +736,10 @@ class Data:
     def print_pred_actual(self):
         print()
         print("________PREDICTIONS_________")
-        for k in self.traffic_prediction:
-            print(k, ":", self.traffic_prediction[k])
+        for road, traffic in enumerate(self.traffic_prediction):
+            if traffic is not None:
+                print(self.road_names[road], ":", TRAFFIC_NAME[traffic])
         print("________REAL TRAFFIC_________")
-        for k in self.real_traffic:
-            print(k, ":", self.real_traffic[k])
\ No newline at end of file
+        for road, traffic in enumerate(self.real_traffic):
+            if traffic is not None:
+                print(self.road_names[road], ":", TRAFFIC_NAME[traffic])
\ No newline at end of file
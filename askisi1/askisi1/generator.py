@@ -0,0 +1,126 @@
+from traffic import TRAFFIC_NAME, LOW, NORMAL, HEAVY
+import argparse
+import math
+import random
+import sys
+
+"""
+A generator of synthetic scenario files, in exactly the format of our sampleGraph files:
+<Source>, <Destination>, <Roads> (RoadName; NodeA; NodeB; normal cost), <Predictions> and <ActualTrafficPerDay> with one <Day> per day.
+
+nodes: how many nodes (NodeX names, X = 0, 1, ..)
+topology: "grid" (nodes on a grid, every node connected with the one on its right and the one under it, so the degree is about 4)
+    or "random" (every node connects with a random node before it, so the graph is always connected, plus more random edges until the
+    average degree is degree)
+multiplicity: the average number of parallel roads of every pair of connected nodes (1 = one road per edge, 2.5 = two or three roads)
+days: how many days of predictions and actual traffic
+accuracy: the probability that the prediction of a road is the actual traffic of that day. Otherwise the prediction is one of the other two
+traffic: the probabilities of the actual traffic of a road being low, normal, heavy
+min_cost, max_cost: the normal cost of every road is uniform in this range
+Source is Node0 and destination is the last node (for a grid, two opposite corners).
+
+Everything is written while we generate it, so the memory we need does not depend on the size of the file. The only problem is that the
+predictions of ALL the days come before the actual traffic of ANY day, and the prediction depends on the actual traffic. So the actual traffic
+of a day comes from its own random.Random seeded with (seed, day), and we simply generate it again for <ActualTrafficPerDay>.
+The same seed always gives the same file.
+
+From the command line: python generator.py ../data/big.txt --nodes 100000 --topology random --degree 5 --multiplicity 1.5 --days 80
+"""
+
+def day_random(seed, day, section): #the random numbers of one day and one section ("actual" or "prediction")
+    return random.Random(str(seed) + ":" + str(day) + ":" + section)
+
+def grid_edges(nodes): #(node a, node b) of every edge of a grid with about sqrt(nodes) columns
+    columns = max(1, math.isqrt(nodes))
+    for node in range(nodes):
+        if (node+1) % columns != 0 and node+1 < nodes:
+            yield node, node+1
+        if node+columns < nodes:
+            yield node, node+columns
+
+def random_edges(nodes, rand, degree): #a random tree (always connected) plus random edges, about nodes*degree/2 edges in total
+    per_node = max(1.0, degree/2)
+    for node in range(1, nodes):
+        yield rand.randrange(node), node
+        extra = int(per_node-1) + (rand.random() < (per_node-1) % 1)
+        for _ in range(extra):
+            other = rand.randrange(nodes-1)
+            yield node, other if other < node else other+1 #never the node itself
+
+def roads_of(edges, rand, multiplicity, min_cost, max_cost): #(node a, node b, normal cost) of every road, multiplicity roads per edge on average
+    for node_a, node_b in edges:
+        count = max(1, int(multiplicity) + (rand.random() < multiplicity % 1))
+        for _ in range(count):
+            yield node_a, node_b, rand.randint(min_cost, max_cost)
+
+def actual_traffic(rand, traffic): #one road's actual traffic code
+    value = rand.random()
+    if value < traffic[0]:
+        return LOW
+    if value < traffic[0]+traffic[1]:
+        return NORMAL
+    return HEAVY
+
+def prediction(rand, actual, accuracy): #the predicted traffic code of a road whose actual traffic is actual
+    if rand.random() < accuracy:
+        return actual
+    return rand.choice([code for code in (LOW, NORMAL, HEAVY) if code != actual])
+
+def write_days(f, seed, days, roads, traffic, accuracy, predictions):
+    for day in range(1, days+1):
+        actual_rand = day_random(seed, day, "actual")
+        prediction_rand = day_random(seed, day, "prediction")
+        f.write("<Day>\n")
+        for road in range(roads):
+            code = actual_traffic(actual_rand, traffic)
+            if predictions:
+                code = prediction(prediction_rand, code, accuracy)
+            f.write("Road" + str(road) + "; " + TRAFFIC_NAME[code] + "\n")
+        f.write("</Day>\n")
+
+def generate(path, nodes=1000, topology="grid", degree=4, multiplicity=1.0, days=80, accuracy=0.7, traffic=(0.3, 0.4, 0.3),
+             min_cost=5, max_cost=100, seed=0):
+    if topology not in ("grid", "random"):
+        raise ValueError("unknown topology: " + str(topology))
+    if nodes < 2:
+        raise ValueError("we need at least 2 nodes")
+    rand = random.Random(seed)
+    edges = grid_edges(nodes) if topology == "grid" else random_edges(nodes, rand, degree)
+    roads = 0
+    with open(path, "w") as f:
+        f.write("<Source>Node0</Source>\n")
+        f.write("<Destination>Node" + str(nodes-1) + "</Destination>\n")
+        f.write("<Roads>\n")
+        for node_a, node_b, cost in roads_of(edges, rand, multiplicity, min_cost, max_cost):
+            f.write("Road" + str(roads) + "; Node" + str(node_a) + "; Node" + str(node_b) + "; " + str(cost) + "\n")
+            roads += 1
+        f.write("</Roads>\n")
+        f.write("<Predictions>\n")
+        write_days(f, seed, days, roads, traffic, accuracy, True)
+        f.write("</Predictions>\n")
+        f.write("<ActualTrafficPerDay>\n")
+        write_days(f, seed, days, roads, traffic, accuracy, False)
+        f.write("</ActualTrafficPerDay>\n")
+    return roads
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic scenario file")
+    parser.add_argument("path")
+    parser.add_argument("--nodes", type=int, default=1000)
+    parser.add_argument("--topology", choices=["grid", "random"], default="grid")
+    parser.add_argument("--degree", type=float, default=4, help="average degree (random topology only)")
+    parser.add_argument("--multiplicity", type=float, default=1.0, help="average number of parallel roads per edge")
+    parser.add_argument("--days", type=int, default=80)
+    parser.add_argument("--accuracy", type=float, default=0.7, help="probability that a prediction is the actual traffic")
+    parser.add_argument("--traffic", type=float, nargs=3, default=[0.3, 0.4, 0.3], metavar=("LOW", "NORMAL", "HEAVY"))
+    parser.add_argument("--min-cost", type=int, default=5)
+    parser.add_argument("--max-cost", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    roads = generate(args.path, args.nodes, args.topology, args.degree, args.multiplicity, args.days, args.accuracy, args.traffic,
+        args.min_cost, args.max_cost, args.seed)
+    print(args.path, ":", args.nodes, "nodes,", roads, "roads,", args.days, "days")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+from array import array
+
+
+"""
+    A compressed sparse row (CSR) graph over interned integer node ids
+
+    ...
+
+    Every node name we read from the file gets interned ONCE to a small integer id (0, 1, 2, ...), and every unordered pair of
+    connected nodes gets ONE edge id, no matter how many parallel roads connect them. All the search algorithms work only with
+    these integers, and we translate back to node names only when we build the output path.
+
+    Attributes
+    ----------
+    names : List
+        node id -> node name. Example: names[3] = "Square1821"
+    ids : Dictionary
+        node name -> node id. Example: ids["Square1821"] = 3
+    edge_nodes : List
+        edge id -> (node id a, node id b) , the two nodes this edge connects
+    edge_index : Dictionary
+        key = (smaller node id, bigger node id), value = edge id. Used only while parsing and for name lookups, never in the searches
+    offsets, neighbors, edge_ids : array
+        The CSR adjacency (created by build()). The neighbors of node u are neighbors[offsets[u]:offsets[u+1]] and the edge
+        that connects u with neighbors[k] is edge_ids[k]. Since the graph is undirected every edge appears twice, once per direction.
+"""
+class Graph:
+    def __init__(self):
+        self.names = []
+        self.ids = {}
+        self.edge_nodes = []
+        self.edge_index = {}
+
+        self.offsets = array("i")
+        self.neighbors = array("i")
+        self.edge_ids = array("i")
+
+    def __len__(self):
+        return len(self.names)
+
+    def intern(self, name): #return the id of a node name, creating a new one if we see the name for the first time
+        node = self.ids.get(name)
+        if node is None:
+            node = len(self.names)
+            self.ids[name] = node
+            self.names.append(name)
+        return node
+
+    def add_edge(self, node_a, node_b): #return the edge id connecting node_a, node_b (ids), creating it if it doesnt exist yet
+        key = (node_a, node_b) if node_a < node_b else (node_b, node_a)
+        edge = self.edge_index.get(key)
+        if edge is None:
+            edge = len(self.edge_nodes)
+            self.edge_index[key] = edge
+            self.edge_nodes.append(key)
+        return edge
+
+    def number_of_edges(self):
+        return len(self.edge_nodes)
+
+    #build the CSR arrays from edge_nodes. Called once, after all the roads have been parsed
+    def build(self):
+        n = len(self.names)
+        degree = [0]*n
+        for node_a, node_b in self.edge_nodes:
+            degree[node_a] += 1
+            degree[node_b] += 1
+
+        offsets = [0]*(n+1)
+        for node in range(n):
+            offsets[node+1] = offsets[node]+degree[node]
+
+        position = offsets[:-1] #next free slot of every node
+        neighbors = [0]*offsets[n]
+        edge_ids = [0]*offsets[n]
+        for edge, (node_a, node_b) in enumerate(self.edge_nodes):
+            neighbors[position[node_a]] = node_b
+            edge_ids[position[node_a]] = edge
+            position[node_a] += 1
+            neighbors[position[node_b]] = node_a
+            edge_ids[position[node_b]] = edge
+            position[node_b] += 1
+
+        self.offsets = array("i", offsets)
+        self.neighbors = array("i", neighbors)
+        self.edge_ids = array("i", edge_ids)
+
+    def adjacent(self, node): #iterate over (neighbor, edge id) of node
+        start, end = self.offsets[node], self.offsets[node+1]
+        return zip(self.neighbors[start:end], self.edge_ids[start:end])
+
+    def edge(self, node_a, node_b): #edge id connecting node ids node_a, node_b (or None if they are not connected)
+        return self.edge_index.get((node_a, node_b) if node_a < node_b else (node_b, node_a))
+
+    def to_names(self, path): #translate a path of node ids back to node names
+        names = self.names
+        return [names[node] for node in path]
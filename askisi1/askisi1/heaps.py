@@ -0,0 +1,85 @@
+"""
+    An indexed binary min-heap with a real decrease-key
+
+    ...
+
+    heapq (and PriorityQueue) can not change the priority of an item that is already inside, so when we find a cheaper path to a node
+    we have to push it AGAIN and ignore the old (stale) entry when it gets popped. This heap remembers the position of every item inside
+    the heap array, so decrease_key() just moves the item up to its new place. Every item is in the heap at most once, so there are no
+    stale pops at all.
+
+    Items are node ids (any hashable works) and ties on the key are broken by the item itself, exactly like the (key, node) tuples
+    we push to heapq, so both heaps expand the nodes in the same order.
+
+    Attributes
+    ----------
+    heap : List
+        The binary heap array of (key, item) tuples
+    position : Dictionary
+        key = item, value = its index in the heap array
+"""
+class IndexedHeap:
+    def __init__(self):
+        self.heap = []
+        self.position = {}
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, item):
+        return item in self.position
+
+    def key(self, item):
+        return self.heap[self.position[item]][0]
+
+    def push(self, item, key):
+        self.heap.append((key, item))
+        self.position[item] = len(self.heap)-1
+        self.sift_up(len(self.heap)-1)
+
+    def decrease_key(self, item, key): #the new key MUST be smaller than the old one
+        i = self.position[item]
+        self.heap[i] = (key, item)
+        self.sift_up(i)
+
+    def pop(self): #remove and return (key, item) with the smallest key
+        heap = self.heap
+        smallest = heap[0]
+        last = heap.pop()
+        del self.position[smallest[1]]
+        if heap:
+            heap[0] = last
+            self.position[last[1]] = 0
+            self.sift_down(0)
+        return smallest
+
+    def sift_up(self, i):
+        heap, position = self.heap, self.position
+        entry = heap[i]
+        while i > 0:
+            parent = (i-1) >> 1
+            if heap[parent] <= entry:
+                break
+            heap[i] = heap[parent]
+            position[heap[i][1]] = i
+            i = parent
+        heap[i] = entry
+        position[entry[1]] = i
+
+    def sift_down(self, i):
+        heap, position = self.heap, self.position
+        n = len(heap)
+        entry = heap[i]
+        while True:
+            child = 2*i+1
+            if child >= n:
+                break
+            if child+1 < n and heap[child+1] < heap[child]:
+                child += 1
+            if entry <= heap[child]:
+                break
+            heap[i] = heap[child]
+            position[heap[i][1]] = i
+            i = child
+        heap[i] = entry
+        position[entry[1]] = i
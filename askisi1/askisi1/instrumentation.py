@@ -0,0 +1,216 @@
+from contextlib import contextmanager
+from data import Data
+from online_algorithms import OnlineLRTAstar
+import argparse
+import functools
+import json
+import random
+import sys
+import time
+
+#https://docs.python.org/3/library/profile.html
+"""
+Named timers and counters for a whole run: parsing, the heuristic, prediction_weight, fix_propabilities, find_real_cost, every search and LRTA*.
+
+It costs NOTHING when it is disabled: enable() replaces the methods of HOOKS (on their class, so every object uses them) with wrappers
+that measure them, and disable() puts the original methods back. So a run without instrumentation runs exactly our normal code.
+The counters come from what our searches already return: the visited nodes and the stats dictionary every search fills if we pass one
+(the searches count them in their loops, and without a stats dictionary they skip it):
+    <search>.nodes_expanded: the visited nodes every search returns
+    <search>.<key>: every key of its stats, so ucs/astar/lpa_star.heap_pushes and .stale_pops, ucs.decrease_keys (indexed heap),
+        ida_star.iterations (one per threshold) and <search>.edges_relaxed for all of them (see each search for what it counts)
+    lrta_star.moves: the moves of every solve, lrta_star.traverse_scans: calls of traverseMinCost and lrta_star.roads_scanned: the parallel roads
+        those calls looked at
+    <timer>.calls: how many times a timed method was called
+Timers are inclusive (parse_day_predictions includes the prediction_weight calls it makes).
+
+Every Data.next_day() closes the day: the timers and counters of the day are kept in days (a list of dictionaries) and start again from 0.
+export(path) writes all the days and their totals as JSON.
+
+profile = the name of one timer (ex. "ucs") to also run that method under cProfile, print_profile() shows where its time went.
+
+From the command line: python instrumentation.py sampleGraph1.txt --days 10 --profile ida_star --export run.json
+"""
+
+def count_search(name): #the after hook of a Data.find_*_path, result = (time, visited nodes, cost, path)
+    def after(instruments, obj, args, kwargs, result, stats):
+        instruments.count(name + ".nodes_expanded", result[1])
+        if stats:
+            for key, value in stats.items():
+                instruments.count(name + "." + key, value)
+    return after
+
+def count_moves(instruments, obj, args, kwargs, result, stats): #OnlineLRTAstar.solve returns (time, cost of all moves, path)
+    instruments.count("lrta_star.moves", len(result[2])-1)
+
+def count_scans(instruments, obj, args, kwargs, result, stats): #OnlineLRTAstar.traverseMinCost(parent, current)
+    parent, current = args
+    instruments.count("lrta_star.traverse_scans")
+    instruments.count("lrta_star.roads_scanned", len(obj.d.edge_roads[obj.d.graph.edge(parent, current)]))
+
+def end_day(instruments, obj, args, kwargs, result, stats): #after Data.next_day, so the day that ended is obj.day-1
+    instruments.end_day(obj.day-1)
+
+#(class, method, timer name or None, after hook or None, position of the stats argument (after self) or None)
+HOOKS = [
+    (Data, "__init__", "data", None, None),
+    (Data, "parse_roads", "parse_roads", None, None),
+    (Data, "load_compiled", "parse_roads", None, None),
+    (Data, "init_heuristic", "heuristic", None, None),
+    (Data, "parse_day_predictions", "parse_day_predictions", None, None),
+    (Data, "prediction_weight", "prediction_weight", None, None),
+    (Data, "parse_actual_traffic", "parse_actual_traffic", None, None),
+    (Data, "fix_propabilities", "fix_propabilities", None, None),
+    (Data, "find_real_cost", "find_real_cost", None, None),
+    (Data, "find_ucs_path", "ucs", count_search("ucs"), 1),
+    (Data, "find_astar_path", "astar", count_search("astar"), 0),
+    (Data, "find_ida_star_path", "ida_star", count_search("ida_star"), 4),
+    (Data, "find_lpa_star_path", "lpa_star", count_search("lpa_star"), 0),
+    (Data, "find_cch_path", "cch", count_search("cch"), 1),
+    (OnlineLRTAstar, "solve", "lrta_star", count_moves, None),
+    (OnlineLRTAstar, "traverseMinCost", None, count_scans, None),
+    (Data, "next_day", None, end_day, None),
+]
+
+class Instruments:
+    def __init__(self):
+        self.timers = {} #name -> seconds, of the current day
+        self.counters = {} #name -> count, of the current day
+        self.days = [] #{"day": .., "timers": .., "counters": ..} of every day that ended
+        self.originals = [] #(class, method name, original method) of everything we replaced
+        self.profile = None #name of the timer we profile
+        self.profiler = None
+
+    @property
+    def enabled(self):
+        return bool(self.originals)
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_time(self, name, seconds):
+        self.timers[name] = self.timers.get(name, 0) + seconds
+        self.count(name + ".calls")
+
+    def wrap(self, cls, method, timer, after, stats_position):
+        original = cls.__dict__[method]
+        instruments = self
+        profiled = timer is not None and timer == self.profile
+
+        @functools.wraps(original)
+        def wrapper(obj, *args, **kwargs):
+            stats = None
+            if stats_position is not None: #ask the search for its stats, unless the caller already did
+                if len(args) > stats_position:
+                    stats = args[stats_position]
+                elif kwargs.get("stats") is None:
+                    kwargs["stats"] = {}
+                stats = kwargs.get("stats", stats)
+            if profiled:
+                instruments.profiler.enable()
+            start_time = time.perf_counter()
+            try:
+                result = original(obj, *args, **kwargs)
+            finally:
+                if timer is not None:
+                    instruments.add_time(timer, time.perf_counter()-start_time)
+                if profiled:
+                    instruments.profiler.disable()
+            if after is not None:
+                after(instruments, obj, args, kwargs, result, stats)
+            return result
+
+        setattr(cls, method, wrapper)
+        self.originals.append((cls, method, original))
+
+    def enable(self, profile=None): #start measuring (profile = the name of one timer to also run under cProfile)
+        if self.enabled:
+            return
+        self.profile = profile
+        if profile:
+            import cProfile #only when we profile
+            self.profiler = cProfile.Profile()
+        else:
+            self.profiler = None
+        for hook in HOOKS:
+            self.wrap(*hook)
+
+    def disable(self): #put back every original method
+        for cls, method, original in reversed(self.originals):
+            setattr(cls, method, original)
+        self.originals = []
+
+    def reset(self):
+        self.timers, self.counters, self.days = {}, {}, []
+
+    def end_day(self, day):
+        self.days.append({"day": day, "timers": self.timers, "counters": self.counters})
+        self.timers, self.counters = {}, {}
+
+    def totals(self): #the sum of every timer and counter over all the days (and what we measured after the last day)
+        timers, counters = dict(self.timers), dict(self.counters)
+        for day in self.days:
+            for name, value in day["timers"].items():
+                timers[name] = timers.get(name, 0) + value
+            for name, value in day["counters"].items():
+                counters[name] = counters.get(name, 0) + value
+        return {"timers": timers, "counters": counters}
+
+    def export(self, path):
+        with open(path, "w") as f:
+            json.dump({"days": self.days, "totals": self.totals()}, f, indent=2)
+
+    def print_totals(self, offset=4):
+        totals = self.totals()
+        print("Timers (seconds, inclusive):")
+        for name, value in sorted(totals["timers"].items(), key=lambda item: -item[1]):
+            print(" "*offset, "{:<24} {:.6f}  ({} calls)".format(name, value, totals["counters"].get(name + ".calls", 0)))
+        print("Counters:")
+        for name, value in sorted(totals["counters"].items()):
+            if not name.endswith(".calls"):
+                print(" "*offset, "{:<24} {}".format(name, value))
+
+    def print_profile(self, sort="cumulative", limit=20):
+        if self.profiler is not None:
+            import pstats
+            pstats.Stats(self.profiler).sort_stats(sort).print_stats(limit)
+
+    @contextmanager
+    def measure(self, name): #a timer around any block of code: with INSTRUMENTS.measure("my phase"): ..
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter()-start_time)
+
+INSTRUMENTS = Instruments() #the one we use, so every part of the program sees the same timers and counters
+
+def enable(profile=None):
+    INSTRUMENTS.enable(profile)
+
+def disable():
+    INSTRUMENTS.disable()
+
+def main():
+    from testing import Test
+    parser = argparse.ArgumentParser(description="Run Test with the instrumentation enabled")
+    parser.add_argument("file", help="scenario file (in ../data)")
+    parser.add_argument("--days", type=int, default=80)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", default=None, help="a timer name (ex. ucs, ida_star, parse_day_predictions) to run under cProfile")
+    parser.add_argument("--export", default=None, help="write the per day timers and counters to this JSON file")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    enable(args.profile)
+    try:
+        Test(args.file, quiet=True).do_everything(args.days)
+    finally:
+        disable()
+    INSTRUMENTS.print_totals()
+    INSTRUMENTS.print_profile()
+    if args.export:
+        INSTRUMENTS.export(args.export)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+import json
+import os
+
+"""
+save_json(path, value) is how we save every JSON file we only keep as an optimization or a memory between runs: the heuristic cache
+(Data.save_heuristic_cache), the day index sidecar (scenario_index.save_index) and the learned heuristic of LRTA* (OnlineLRTAstar.save).
+
+We write a temporary file first and os.replace it over path, so a run that gets killed never leaves a half written file behind. There is one
+temporary file per process, so parallel runs (see batch.py) never write to the same one.
+None of these files is needed to run, so if we can not write it (no permission, a bad path, a full disk, ..) we just return False and go on.
+"""
+def save_json(path, value):
+    tmp = str(path) + "." + str(os.getpid()) + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(tmp, "w") as f:
+            json.dump(value, f)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp) #if we got as far as creating it
+        except OSError:
+            pass
+        return False
+    return True
@@ -0,0 +1,130 @@
+from offline_algorithms import dijkstra_create_heuristic, shortest_path_tree
+import math
+import random
+
+#https://www.microsoft.com/en-us/research/publication/computing-the-shortest-path-a-search-meets-graph-theory/ (ALT: A*, Landmarks, Triangle inequality)
+"""
+Data.heuristic is the exact "low traffic" distance of every node to OUR destination, so it is useless for any other destination, and a new one
+costs a full dijkstra. With landmarks we pay a few dijkstras once and get a heuristic for ANY destination.
+
+We pick k nodes (landmarks) and store dist[L][v] = the cheapest low traffic cost (heuristic_help) between landmark L and every node v.
+Our roads have no direction, so for every landmark the triangle inequality gives
+    d(v, goal) >= |dist[L][v] - dist[L][goal]|
+and the biggest of those over all landmarks is our h(v). heuristic_help is the cheapest a road can ever cost, so this h never overestimates
+the cost of any day, and it is consistent (like Data.heuristic), so astar, IDAStar and LPAStar can use it as it is.
+
+Landmarks far away "behind" the nodes give the best bounds. Two ways to pick them:
+farthest: the first landmark is the node farthest from node 0, and every next one is the node farthest from all the landmarks we already have.
+avoid: (Goldberg, Werneck) build the shortest path tree of a random root node, give every node the weight d(root, v) - h(root, v) (how bad our current
+    landmarks are for it), and walk from root always to the child with the heaviest subtree (subtrees that already have a landmark weigh 0).
+    The leaf we end up at is the next landmark, it covers the region where our bounds are the worst. The root comes from a random.Random seeded
+    with the number of landmarks, so the same graph always gets the same landmarks (and the global random, that our predictions use, is not touched).
+"""
+
+def select_farthest(distances, number_of_nodes, start=0): #the node farthest from all the landmarks we have (from start, if there are none)
+    best, best_node = -1, start
+    for node in range(number_of_nodes):
+        closest = min((dist[node] for dist in distances), default=math.inf)
+        if closest == 0: #a landmark itself
+            continue
+        if closest > best:
+            best, best_node = closest, node
+    return best_node
+
+def lower_bound(distances, node_a, node_b): #the triangle inequality bound of the landmarks we have between two nodes
+    best = 0
+    for dist in distances:
+        bound = abs(dist[node_a]-dist[node_b]) #inf-inf is nan, and nan > best is False, so a landmark that reaches neither node is ignored
+        if bound > best:
+            best = bound
+    return best
+
+def select_avoid(graph, heuristic_help, distances, landmarks):
+    root = random.Random(len(landmarks)).randrange(len(graph))
+    _, costs, parent = shortest_path_tree(graph, heuristic_help, root)
+
+    #nodes in the order the tree reached them (by cost), so every child comes after its parent
+    order = sorted((node for node in range(len(graph)) if costs[node] != math.inf), key=costs.__getitem__)
+    children = [[] for _ in range(len(graph))]
+    for node in order:
+        if parent[node] >= 0:
+            children[parent[node]].append(node)
+
+    size = [0]*len(graph)
+    has_landmark = [False]*len(graph)
+    for node in landmarks:
+        has_landmark[node] = True
+    for node in reversed(order): #children first
+        for child in children[node]:
+            has_landmark[node] = has_landmark[node] or has_landmark[child]
+        if has_landmark[node]:
+            size[node] = 0
+        else:
+            size[node] = costs[node]-lower_bound(distances, root, node) + sum(size[child] for child in children[node])
+
+    node = root #the root itself always has the landmarks in its subtree, so we start from its children
+    while children[node]:
+        child = max(children[node], key=size.__getitem__)
+        if size[child] == 0:
+            break
+        node = child
+    if node == root: #every branch has a landmark already
+        return select_farthest(distances, len(graph))
+    return node
+
+"""
+    The landmarks of a graph and their distance arrays
+
+    ...
+
+    Attributes
+    ----------
+    landmarks : List
+        the node ids of the landmarks
+    distances : List
+        distances[i][node] = the cheapest low traffic cost between landmarks[i] and node (math.inf if it can not be reached)
+"""
+class Landmarks:
+    def __init__(self, graph, heuristic_help, k=8, selection="farthest"):
+        if selection not in ("farthest", "avoid"):
+            raise ValueError("unknown landmark selection: " + str(selection))
+        self.number_of_nodes = len(graph)
+        self.landmarks = []
+        self.distances = []
+        for _ in range(min(k, len(graph))):
+            if not self.landmarks: #the first one is the same for both, the node farthest from node 0
+                node = select_farthest([dijkstra_create_heuristic(graph, heuristic_help, 0)], len(graph))
+            elif selection == "farthest":
+                node = select_farthest(self.distances, len(graph))
+            else:
+                node = select_avoid(graph, heuristic_help, self.distances, self.landmarks)
+            if node in self.landmarks: #no node left that our landmarks dont cover
+                break
+            self.landmarks.append(node)
+            self.distances.append(dijkstra_create_heuristic(graph, heuristic_help, node))
+
+    def heuristic(self, goal): #h(node) of ANY goal, to pass where a heuristic list is expected (heuristic[node])
+        return LandmarkHeuristic(self.distances, goal, self.number_of_nodes)
+
+"""
+A heuristic "list" for one goal: heuristic[node] = max over the landmarks of |dist[L][node] - dist[L][goal]|.
+It is computed the first time we ask for a node and then remembered, so IDA* (which asks for the same nodes in every iteration) pays it once.
+"""
+class LandmarkHeuristic:
+    def __init__(self, distances, goal, number_of_nodes):
+        self.pairs = [(dist, dist[goal]) for dist in distances]
+        self.values = [None]*number_of_nodes
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, node):
+        value = self.values[node]
+        if value is None:
+            value = 0
+            for dist, to_goal in self.pairs:
+                bound = abs(dist[node]-to_goal) #see lower_bound
+                if bound > value:
+                    value = bound
+            self.values[node] = value
+        return value
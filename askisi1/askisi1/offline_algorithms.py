@@ -1,14 +1,16 @@
-from queue import PriorityQueue
+from heaps import IndexedHeap
+import heapq
 import time
 import math
 
-#https://towardsdatascience.com/introduction-to-priority-queues-in-python-83664d3178c3  -> PriorityQueue
+#https://docs.python.org/3/library/heapq.html -> heapq (PriorityQueue takes a lock on every put/get, we dont need threads here)
 #https://cyluun.github.io/blog/uninformed-search-algorithms-in-python
 #https://www.youtube.com/watch?v=dRMvK76xQJI ucs algorithm
 """
 This is a Uniform Cost Search , with some differences (I will note them bellow)
 I expand nodes according to their path costs form the root node. 
-I use fringe as PriorityQueue (see python doc), visited as set (O(1) existance search), parent dictionary to backtrace the path
+The graph is our CSR graph (see graph.py), so every node is an integer id and weight is a list indexed by edge id.
+I use fringe as a heapq list (see python doc), visited as set (O(1) existance search), parent dictionary to backtrace the path
 and dict_node_weight which helps us decide which parent (or else, path) to keep if we find a node which HAS to be inserted in the fringe,
 but it is ALREADY in the fringe from a different path. 
 
@@ -29,45 +31,357 @@ parent (equal to the current_node which expanded our new path to nodeX) , we als
 fringe AGAIN! This way we "forget" the more costly path which is right now in the fringe (parent was changed in dictionary). Otherwise, we DONT change the parent 
 (because the nodeX that is in the fringe came from a CHEAPER path) and we DONT put the nodeX to the fringe (it is already there from a cheaper path), so basically we do nothing.
 
-IMPORTAND NOTE: the fringe (PriorityQueue) can have the nodeX twice in it BUT with the same parent. We are certain that our lesser ucs_weight will get 
+IMPORTAND NOTE: the fringe (heapq) can have the nodeX twice in it BUT with the same parent. We are certain that our lesser ucs_weight will get 
 popped and expanded first. AND also, for time sake, every time we get a node from the fringe, we also check if it has been VISITED before. This can obviously
-happen, as I explained above, and in such case we ignore this node COMPLETELY.
+happen, as I explained above, and in such case we ignore this node COMPLETELY (this is a "stale pop").
+
+heap = "lazy" is everything described above. heap = "indexed" uses an IndexedHeap (see heaps.py) instead, which does a TRUE decrease-key, so
+every node is in the fringe at most once and there are no stale pops (see ucs_indexed bellow). Both return the same (time, visited_nodes, cost, path)
+and both expand the nodes in the same order. If we pass a stats dictionary, we also get stats["heap_pushes"] and stats["stale_pops"] back, 
+to measure the difference between the two heaps on big graphs, stats["decrease_keys"] (only the indexed heap does them) and 
+stats["edges_relaxed"]: every edge we relaxed, or else every time we computed a new cost for a not visited node through an edge.
+If the end can not be reached we return cost = math.inf and an empty path.
 """
-def ucs(graph, weight, start, end):
+def ucs(graph, weight, start, end, heap="lazy", stats=None):
+    if heap == "indexed":
+        return ucs_indexed(graph, weight, start, end, stats)
+    elif heap != "lazy":
+        raise ValueError("unknown heap: " + str(heap))
+
     start_time = time.perf_counter() #time
-    fringe = PriorityQueue() #priority queue , with priority of the cheaper ucs_weight
+    fringe = [] #heapq priority queue , with priority of the cheaper ucs_weight
+    push = heapq.heappush
+    pop = heapq.heappop
     visited = set()
     parent = {} #dictionary of node's parent , to backtrace the path
     dict_node_weight = {}  #dictionary of node's path cost from the starting node (Explained thoroughly above)
 
     visited_nodes = 0
+    heap_pushes = 1
+    stale_pops = 0
+    edges_relaxed = 0
 
-    fringe.put((0, start)) #put the source in the fringe with ucs_weight=0
-    while True:
-        ucs_w, current_node = fringe.get()
+    push(fringe, (0, start)) #put the source in the fringe with ucs_weight=0
+    while fringe:
+        ucs_w, current_node = pop(fringe)
         
         if(current_node in visited): #this is because THERE IS A CHANCE we can have the same node in fringe, and that means that the current_node could have been already processed
+            stale_pops += 1
             continue
 
         visited.add(current_node) #add to visited the current node 
         visited_nodes += 1
 
         if(current_node == end): #then we reached goal 
+            ucs_stats(stats, heap_pushes, stale_pops, edges_relaxed)
             return (time.perf_counter()-start_time), visited_nodes, ucs_w, backtrace(parent, start, end)
 
-        for node in graph[current_node]: #for every child of current_node
+        for node, edge in graph.adjacent(current_node): #for every child of current_node (and the edge id connecting them)
             if node not in visited: #because of cyrcles
-                new_ucs_weight = ucs_w+weight[(current_node, node)]  #current_node's ucs_weight + the weight from current_node to its child node
+                new_ucs_weight = ucs_w+weight[edge]  #current_node's ucs_weight + the weight from current_node to its child node
+                edges_relaxed += 1
                 if (node in dict_node_weight): #this means that the node is already in the fringe, and now we have a different path to it , with parent = current_node
                     if(dict_node_weight[node]> new_ucs_weight): #this means that the best path (cheaper) to our node is with parent=current_node (and not the previous parent)
                         dict_node_weight[node] = new_ucs_weight #store the new cheaper weight to our node
                         parent[node] = current_node #update parent
-                        fringe.put((new_ucs_weight, node))
+                        push(fringe, (new_ucs_weight, node))
+                        heap_pushes += 1
                     #else: do nothing (so no need to put it)
                 else:
                     dict_node_weight[node] = new_ucs_weight #store the weight
                     parent[node] = current_node #update parent
-                    fringe.put((new_ucs_weight, node))
+                    push(fringe, (new_ucs_weight, node))
+                    heap_pushes += 1
+
+    ucs_stats(stats, heap_pushes, stale_pops, edges_relaxed)
+    return (time.perf_counter()-start_time), visited_nodes, math.inf, []
+
+#Same as ucs, but when we find a cheaper path to a node that is in the fringe we DECREASE its key inside the heap instead of pushing it again.
+#A node that is not in the fringe and not visited gets pushed. So the fringe never has duplicates and we never pop a stale node.
+def ucs_indexed(graph, weight, start, end, stats=None):
+    start_time = time.perf_counter() #time
+    fringe = IndexedHeap()
+    visited = set()
+    parent = {} #dictionary of node's parent , to backtrace the path
+
+    visited_nodes = 0
+    heap_pushes = 1
+    decrease_keys = 0
+    edges_relaxed = 0
+
+    fringe.push(start, 0) #put the source in the fringe with ucs_weight=0
+    while fringe:
+        ucs_w, current_node = fringe.pop()
+        visited.add(current_node)
+        visited_nodes += 1
+
+        if(current_node == end): #then we reached goal
+            ucs_stats(stats, heap_pushes, 0, edges_relaxed, decrease_keys)
+            return (time.perf_counter()-start_time), visited_nodes, ucs_w, backtrace(parent, start, end)
+
+        for node, edge in graph.adjacent(current_node):
+            if node not in visited:
+                new_ucs_weight = ucs_w+weight[edge]
+                edges_relaxed += 1
+                if node in fringe:
+                    if(fringe.key(node) > new_ucs_weight): #cheaper path to a node that is waiting in the fringe
+                        parent[node] = current_node
+                        fringe.decrease_key(node, new_ucs_weight)
+                        decrease_keys += 1
+                else:
+                    parent[node] = current_node
+                    fringe.push(node, new_ucs_weight)
+                    heap_pushes += 1
+
+    ucs_stats(stats, heap_pushes, 0, edges_relaxed, decrease_keys)
+    return (time.perf_counter()-start_time), visited_nodes, math.inf, []
+
+def ucs_stats(stats, heap_pushes, stale_pops, edges_relaxed, decrease_keys=0): #fill the (optional) stats dictionary of ucs
+    if stats is not None:
+        stats["heap_pushes"] = heap_pushes
+        stats["stale_pops"] = stale_pops
+        stats["decrease_keys"] = decrease_keys
+        stats["edges_relaxed"] = edges_relaxed
+
+
+"""
+Bidirectional Dijkstra (meet in the middle). Our graph is undirected, so we can run one ucs forward from start and one backward from end
+at the same time, always expanding the side whose fringe has the cheaper node. mu is the cost of the cheapest start->end path we have seen so far
+and meet is the node where the two searches touched for that path. Every time one side finds a path to a node that the other side has reached too,
+we check if dist_forward[node] + dist_backward[node] is a new mu.
+Stopping criterion: when (cheapest in forward fringe) + (cheapest in backward fringe) >= mu, no path can be cheaper than mu anymore.
+The path is backtrace(parent_forward, start, meet) and the reverse of backtrace(parent_backward, end, meet) stitched together.
+Each side settles roughly the nodes inside a "ball" with half the radius of the ucs ball, so on long queries this settles about half the nodes.
+Returns the same (time, visited_nodes, cost, path) as ucs, and the same stats if we pass a stats dictionary.
+"""
+def bidirectional_ucs(graph, weight, start, end, stats=None):
+    start_time = time.perf_counter() #time
+    if start == end:
+        ucs_stats(stats, 0, 0, 0)
+        return (time.perf_counter()-start_time), 1, 0, [start]
+
+    push = heapq.heappush
+    pop = heapq.heappop
+    fringe = ([(0, start)], [(0, end)]) #index 0 is the forward search, index 1 the backward one
+    dist = ({start: 0}, {end: 0})
+    parent = ({}, {})
+    visited = (set(), set())
+
+    mu = math.inf
+    meet = None
+    visited_nodes = 0
+    heap_pushes = 2 #start and end
+    stale_pops = 0
+    edges_relaxed = 0
+
+    while fringe[0] and fringe[1]:
+        if fringe[0][0][0] + fringe[1][0][0] >= mu: #nothing in the fringes can give a cheaper path
+            break
+        side = 0 if fringe[0][0][0] <= fringe[1][0][0] else 1
+        other = 1-side
+        ucs_w, current_node = pop(fringe[side])
+        if(current_node in visited[side]):
+            stale_pops += 1
+            continue
+        visited[side].add(current_node)
+        visited_nodes += 1
+
+        this_dist, other_dist = dist[side], dist[other]
+        for node, edge in graph.adjacent(current_node):
+            if node in visited[side]:
+                continue
+            new_ucs_weight = ucs_w+weight[edge]
+            edges_relaxed += 1
+            if(node not in this_dist or this_dist[node] > new_ucs_weight):
+                this_dist[node] = new_ucs_weight
+                parent[side][node] = current_node
+                push(fringe[side], (new_ucs_weight, node))
+                heap_pushes += 1
+                if(node in other_dist and new_ucs_weight+other_dist[node] < mu): #the two searches meet at node with a cheaper path
+                    mu = new_ucs_weight+other_dist[node]
+                    meet = node
+
+    ucs_stats(stats, heap_pushes, stale_pops, edges_relaxed)
+    if meet is None:
+        return (time.perf_counter()-start_time), visited_nodes, math.inf, []
+    path = backtrace(parent[0], start, meet)
+    path_back = backtrace(parent[1], end, meet)
+    path_back.reverse()
+    return (time.perf_counter()-start_time), visited_nodes, mu, path + path_back[1:]
+
+"""
+Lifelong Planning A* (LPA*), the incremental planner we keep across days.
+http://idm-lab.org/bib/abstracts/papers/aij04.pdf (Koenig, Likhachev, Furcy) - PSEUDOCODE!!!!!!!
+
+The road network never changes, only the weight of some edges from one day to the next. So instead of searching from scratch every day 
+(like ucs, ida_star and astar do) we keep for every node:
+g: the cost from start we found in the last search
+rhs: a one step lookahead, rhs[n] = min(g[parent] + weight[parent, n]) over the neighbors of n (and rhs[start] = 0)
+A node with g == rhs is "consistent". Every day update() gets ONLY the edges whose weight changed, fixes rhs of their two nodes and puts the
+ones that became inconsistent in the fringe. Then search() processes inconsistent nodes in order of key = (min(g,rhs)+h, min(g,rhs)), like A*,
+only until the goal is consistent and nothing in the fringe can improve it. So only the part of the search tree that the changed weights 
+actually touch gets reprocessed. The first search (every edge "changed") is a normal A*.
+
+The fringe is a heapq with lazy deletion, fringe_key[node] is the key the node has in the fringe right now (a node not in fringe_key is not 
+in the fringe) and any popped entry with a different key is stale. 
+search() returns the same (time, visited_nodes, cost, path) as ucs, where visited_nodes is the number of nodes reprocessed for THIS day.
+If we pass it a stats dictionary we also get stats["heap_pushes"], stats["stale_pops"] and stats["edges_relaxed"] (every g[parent] + weight
+that update_vertex looked at) since the previous search, so the work of update() is in there too.
+
+IMPORTAND: our weights are floats, so f = g+h of two nodes can be the same number but rounded differently (94.2 vs 94.19999999999999). 
+If we stop when the first part of the top key is "bigger" only because of rounding, we can leave a node that makes the goal cheaper/more expensive
+unprocessed. So we keep going while the top key is within TOLERANCE of the goal's key. Processing a few more nodes is always safe.
+"""
+class LPAStar:
+    TOLERANCE = 1e-9
+
+    def __init__(self, graph, heuristic, start, goal):
+        self.graph = graph
+        self.heuristic = heuristic
+        self.start = start
+        self.goal = goal
+        self.weight = None #the weight list of the day we are planning for
+
+        self.g = [math.inf]*len(graph)
+        self.rhs = [math.inf]*len(graph)
+        self.rhs[start] = 0
+        self.fringe = []
+        self.fringe_key = {}
+        self.heap_pushes = 0 #the counters of stats, since the last search
+        self.stale_pops = 0
+        self.edges_relaxed = 0
+        self.insert(start)
+
+    def key(self, node):
+        best = min(self.g[node], self.rhs[node])
+        return (best+self.heuristic[node], best)
+
+    def insert(self, node):
+        key = self.key(node)
+        self.fringe_key[node] = key
+        heapq.heappush(self.fringe, (key, node))
+        self.heap_pushes += 1
+
+    def update_vertex(self, node):
+        if node != self.start:
+            rhs = math.inf
+            g, weight = self.g, self.weight
+            for parent, edge in self.graph.adjacent(node):
+                if g[parent]+weight[edge] < rhs:
+                    rhs = g[parent]+weight[edge]
+            self.rhs[node] = rhs
+            self.edges_relaxed += self.graph.offsets[node+1]-self.graph.offsets[node] #one for every neighbor we looked at
+        self.fringe_key.pop(node, None) #remove it from the fringe (the heap entry becomes stale)
+        if self.g[node] != self.rhs[node]:
+            self.insert(node)
+
+    def update(self, weight, changed_edges): #the weight list of the new day and the edge ids whose weight changed since our last search
+        self.weight = weight
+        for edge in changed_edges:
+            node_a, node_b = self.graph.edge_nodes[edge]
+            self.update_vertex(node_a)
+            self.update_vertex(node_b)
+
+    def top_key(self): #smallest valid key in the fringe, dropping stale entries on the way
+        fringe, fringe_key = self.fringe, self.fringe_key
+        while fringe:
+            key, node = fringe[0]
+            if fringe_key.get(node) == key:
+                return key
+            heapq.heappop(fringe)
+            self.stale_pops += 1
+        return (math.inf, math.inf)
+
+    def search(self, stats=None):
+        start_time = time.perf_counter() #time
+        g, rhs, goal = self.g, self.rhs, self.goal
+        reprocessed = 0
+
+        while self.top_key()[0] <= self.key(goal)[0]+self.TOLERANCE or rhs[goal] != g[goal]:
+            if not self.fringe_key: #nothing left to process, the goal can not be reached
+                break
+            _, node = heapq.heappop(self.fringe)
+            del self.fringe_key[node]
+            reprocessed += 1
+            if g[node] > rhs[node]: #overconsistent, we found a cheaper path to node
+                g[node] = rhs[node]
+                for child, _ in self.graph.adjacent(node):
+                    self.update_vertex(child)
+            else: #underconsistent, the path to node got more expensive
+                g[node] = math.inf
+                self.update_vertex(node)
+                for child, _ in self.graph.adjacent(node):
+                    self.update_vertex(child)
+
+        if stats is not None:
+            stats["heap_pushes"], stats["stale_pops"], stats["edges_relaxed"] = self.heap_pushes, self.stale_pops, self.edges_relaxed
+        self.heap_pushes = self.stale_pops = self.edges_relaxed = 0
+        if g[goal] == math.inf:
+            return (time.perf_counter()-start_time), reprocessed, math.inf, []
+        return (time.perf_counter()-start_time), reprocessed, g[goal], self.path()
+
+    def path(self): #walk back from the goal, always to the neighbor we reached it from (g[parent] + weight = g[node])
+        g, weight = self.g, self.weight
+        path = [self.goal]
+        while path[-1] != self.start:
+            node = path[-1]
+            best = math.inf
+            best_parent = None
+            for parent, edge in self.graph.adjacent(node):
+                if g[parent]+weight[edge] < best:
+                    best = g[parent]+weight[edge]
+                    best_parent = parent
+            path.append(best_parent)
+        path.reverse()
+        return path
+
+"""
+A* search. It is our ucs, but the fringe is ordered by f(n) = g(n) + h(n) instead of g(n), where h(n) is Data.heuristic (the cheapest "low" traffic
+cost from n to the goal, see dijkstra_create_heuristic). This heuristic never overestimates, and it is consistent (a road can never cost less than
+its "low" cost), so the first time we pop a node we have its cheapest path, exactly like ucs, and we never have to expand a node twice like IDA* does.
+Returns the same (time, visited_nodes, cost, path) as ucs, and the same stats if we pass a stats dictionary.
+"""
+def astar(graph, weight, heuristic, start, end, stats=None):
+    start_time = time.perf_counter() #time
+    fringe = [] #heapq priority queue of (f, g, node)
+    push = heapq.heappush
+    pop = heapq.heappop
+    visited = set()
+    parent = {} #dictionary of node's parent , to backtrace the path
+    dict_node_weight = {start: 0} #g(n) of every node that went in the fringe
+
+    visited_nodes = 0
+    heap_pushes = 1
+    stale_pops = 0
+    edges_relaxed = 0
+
+    push(fringe, (heuristic[start], 0, start))
+    while fringe:
+        _, g, current_node = pop(fringe)
+
+        if(current_node in visited): #stale entry, we pushed this node again with a cheaper path
+            stale_pops += 1
+            continue
+
+        visited.add(current_node)
+        visited_nodes += 1
+
+        if(current_node == end): #then we reached goal
+            ucs_stats(stats, heap_pushes, stale_pops, edges_relaxed)
+            return (time.perf_counter()-start_time), visited_nodes, g, backtrace(parent, start, end)
+
+        for node, edge in graph.adjacent(current_node):
+            if node not in visited:
+                new_g = g+weight[edge]
+                edges_relaxed += 1
+                if(node not in dict_node_weight or dict_node_weight[node] > new_g): #first path to node, or a cheaper one
+                    dict_node_weight[node] = new_g
+                    parent[node] = current_node
+                    push(fringe, (new_g+heuristic[node], new_g, node))
+                    heap_pushes += 1
+
+    ucs_stats(stats, heap_pushes, stale_pops, edges_relaxed)
+    return (time.perf_counter()-start_time), visited_nodes, math.inf, []
 
 #this is a simple function, COPY PASTE from https://stackoverflow.com/questions/8922060/how-to-trace-the-path-in-a-breadth-first-search
 def backtrace(parent, start, end):
@@ -78,32 +392,65 @@ def backtrace(parent, start, end):
     return path
 
 
-#https://stackoverflow.com/questions/3282823/get-the-key-corresponding-to-the-minimum-value-within-a-dictionary
+"""
+One-to-many: a Dijkstra from root WITHOUT a goal, so every node we can reach gets its final cost and its parent (the next node on its
+cheapest path towards root). Our roads have no direction, so this one tree answers "root -> node" AND "node -> root" for every node, and
+each query is only a walk up the tree (see tree_path). Edges with weight None (no road this day) are skipped.
+Returns (time, costs, parent), lists indexed by node id. Nodes we can not reach have cost math.inf, and parent -1 (like root).
+"""
+def shortest_path_tree(graph, weight, root):
+    start_time = time.perf_counter()
+    costs = [math.inf]*len(graph)
+    parent = [-1]*len(graph)
+    visited = [False]*len(graph)
+    costs[root] = 0
+    fringe = [(0, root)]
+
+    while fringe:
+        cost, current_node = heapq.heappop(fringe)
+        if visited[current_node]: #stale entry
+            continue
+        visited[current_node] = True
+        for node, edge in graph.adjacent(current_node):
+            if visited[node] or weight[edge] is None:
+                continue
+            if cost+weight[edge] < costs[node]:
+                costs[node] = cost+weight[edge]
+                parent[node] = current_node
+                heapq.heappush(fringe, (costs[node], node))
+    return (time.perf_counter()-start_time), costs, parent
+
+def tree_path(parent, root, node): #the path node -> .. -> root of a shortest_path_tree, [] if node can not reach root
+    path = [node]
+    while path[-1] != root:
+        if parent[path[-1]] < 0:
+            return []
+        path.append(parent[path[-1]])
+    return path
+
+
 #https://www.codingame.com/playgrounds/1608/shortest-paths-with-dijkstras-algorithm/dijkstras-algorithm
+#https://docs.python.org/3/library/heapq.html
+#Instead of searching the whole unvisited dictionary for the cheapest node (O(V) every step, O(V^2) in total) we keep a heapq of (cost, node)
+#and, exactly like ucs, we push a node again when we find a cheaper path to it and ignore it when it gets popped if it is already visited. O((V+E)logV)
 def dijkstra_create_heuristic(graph, heuristic_help, goal): #create approximaiton of distance of every node to goal, from low predictions (cheapest)
-    costs = {}
-    unvisited = {}
+    costs = [math.inf]*len(graph) #index = node id, nodes we can not reach keep math.inf
     visited = set() #relaxed nodes
+    fringe = [(0, goal)]
 
-    #initialize costs
-    #initialize unvisited
-    for node in graph:
-        unvisited[node] = math.inf
-        costs[node] = math.inf
-    costs[goal] = 0
-    unvisited[goal] = 0
-
-    while unvisited: #while there are nodes in unvisited
-        current_node = min(unvisited, key=unvisited.get) #get the node with the least cost , which in the first case will obviously be goal (with cost 0)
+    while fringe: #while there are nodes in the fringe
+        cost, current_node = heapq.heappop(fringe) #get the node with the least cost , which in the first case will obviously be goal (with cost 0)
+        if(current_node in visited): #stale entry, we already found the cheapest cost of this node
+            continue
         visited.add(current_node) #add current_node to visited
-        costs[current_node] = unvisited[current_node] #since current_node was chosen, its cost on unvisited dictionary is final, and the cheapest one. so store it on costs[current_node]
-        del unvisited[current_node] #delete current_node key from unvisited dictionary
+        costs[current_node] = cost #since current_node was chosen, its cost is final, and the cheapest one. so store it on costs[current_node]
 
-        for node in graph[current_node]:
+        for node, edge in graph.adjacent(current_node):
             if(node in visited): 
                 continue
-            if(costs[current_node]+heuristic_help[current_node, node] < unvisited[node]): #if: the cheapest cost to current_node + cost from current_node to node < the stored cost in node, then change it!
-                unvisited[node] = costs[current_node]+heuristic_help[current_node, node]
+            if(cost+heuristic_help[edge] < costs[node]): #if: the cheapest cost to current_node + cost from current_node to node < the stored cost in node, then change it!
+                costs[node] = cost+heuristic_help[edge]
+                heapq.heappush(fringe, (costs[node], node))
     return costs #return our final heuristic costs, which is the heuristic function of each node
 
 
@@ -111,66 +458,141 @@ def dijkstra_create_heuristic(graph, heuristic_help, goal): #create approximaito
 
 """
 Performs the iterative deepening A Star (A*) algorithm to find the shortest path from a start to a target node.
-graph: Our graph
-heuristic: The cheapest cost to go from a node to goal, already calculated in Data.init_heuristic()
-"""
+graph: Our CSR graph (see graph.py), start and goal are node ids
+weight: The weight of every edge, indexed by edge id
+heuristic: The cheapest cost to go from a node to goal (indexed by node id), already calculated in Data.init_heuristic()
 
-#Also, a way to think about ida_star_path is that it stores the path each node is right now. If it goes very deep the path will become huge, 
-#untill we start popping (this will happen when we reach a f(n) limit)
-ida_star_path = [] #global variable of ida star path (cuz of recursion)
-ida_star_visited_nodes = 0
+The IDAStar object only keeps the graph, weight and heuristic. Everything a search changes (the path, the nodes on the path, the counters) is
+local to search(), so the same object (or many of them) can answer many queries at the same time, in threads or in a server.
+There is also no recursion: the DFS of every threshold iteration uses an explicit stack, so very long paths can't hit python's recursion limit.
 
+Two options make every iteration re-expand less of the tree (by default both are off and we get the plain IDA* above):
+transposition_size: If > 0, a transposition table with up to that many nodes remembers the cheapest distance from start that we have reached each node
+    with, in the CURRENT iteration. If we reach the node again with the same or bigger distance, everything under it was already searched with 
+    at least as much budget, so we prune it. On graphs with many cycles and parallel roads this is most of the tree. When the table is full we
+    stop adding nodes to it (but still prune with the ones it has), so the memory stays bounded.
+threshold_factor, threshold_bucket: How the threshold grows. Instead of the exact next-bigger f(n) we use max(next f(n), threshold*threshold_factor),
+    rounded up to a multiple of threshold_bucket (if threshold_bucket > 0). Bigger steps mean fewer iterations. But then the first goal we find
+    is not always the cheapest, so in this case the iteration keeps going like a branch and bound, only looking at nodes with f(n) < the best
+    cost found so far, and returns the cheapest path under the threshold (which is the optimal one).
+"""
 #IMPORTAND: #https://en.wikipedia.org/wiki/Iterative_deepening_A* - PSEUDOCODE!!!!!!!
+class IDAStar:
+    def __init__(self, graph, weight, heuristic, transposition_size=0, threshold_factor=1.0, threshold_bucket=0):
+        self.graph = graph
+        self.weight = weight
+        self.heuristic = heuristic
+        self.transposition_size = transposition_size
+        self.threshold_factor = threshold_factor
+        self.threshold_bucket = threshold_bucket
+        self.exact = threshold_factor <= 1.0 and threshold_bucket <= 0 #exact next-bigger threshold, the first goal we find is the cheapest
 
-def ida_star(graph, weight, heuristic, start, goal):
-    start_time = time.perf_counter() #time
-    global ida_star_visited_nodes
-    global ida_star_path
-    ida_star_path.clear() 
-    ida_star_visited_nodes = 0
+    #return (time, visited_nodes, cost, path) exactly like ucs. If we pass a stats dictionary we also get stats["iterations"] (one per threshold)
+    #and stats["edges_relaxed"] (every child distance we computed, in all the iterations)
+    def search(self, start, goal, stats=None):
+        start_time = time.perf_counter() #time
+        visited_nodes = 0
+        edges_relaxed = 0
+        iterations = 0
+        threshold = self.heuristic[start]
 
-    threshold = heuristic[start]
-    ida_star_path.append(start)
+        while True:
+            distance, found, path, visited, relaxed = self.iteration(start, goal, threshold)
+            visited_nodes += visited
+            edges_relaxed += relaxed
+            iterations += 1
+            if (found or distance == math.inf): # we found the goal, or there is no bigger threshold to try (the goal can not be reached)
+                if stats is not None:
+                    stats["iterations"] = iterations
+                    stats["edges_relaxed"] = edges_relaxed
+                if (found):
+                    return (time.perf_counter()-start_time), visited_nodes, distance, path
+                return (time.perf_counter()-start_time), visited_nodes, math.inf, []
+            threshold = self.next_threshold(threshold, distance) # if it hasn't found the node, it returns the next-bigger threshold
 
-    while True:
-        distance, boolean = ida_star_rec(graph, weight, heuristic, goal, 0, threshold)
-        if (boolean): # we found the goal
-            return (time.perf_counter()-start_time), ida_star_visited_nodes, distance, ida_star_path
-        else: # if it hasn't found the node, it returns the next-bigger threshold
-            threshold = distance
+    def next_threshold(self, threshold, next_f):
+        if self.exact:
+            return next_f
+        new_threshold = max(next_f, threshold*self.threshold_factor)
+        if self.threshold_bucket > 0:
+            new_threshold = math.ceil(new_threshold/self.threshold_bucket)*self.threshold_bucket
+        return new_threshold
 
-"""
-Performs DFS up to a depth where a threshold is reached using f(n) = g(n)+h(n) (as opposed to interative-deepening DFS which stops at a fixed depth).
-graph: Our graph
-heuristic: The cheapest cost to go from a node to goal
-node: The node to continue from.
-goal: The node we are searching for.
-distance:  Distance from start node to current node.
-threshold: Threshold to reach before stopping and starting again
-"""
-def ida_star_rec(graph, weight, heuristic, goal, distance, threshold):
-    global ida_star_visited_nodes
-    global ida_star_path
-
-    node = ida_star_path[-1] #choose the last node that was put in the path
-    f = distance + heuristic[node]
-
-    if f > threshold: #Breached threshold with heuristic
-        return f, False
-
-    if node == goal: # We have found the goal node
-        return distance, True
-
-    # ...then, for all child nodes....
-    min = math.inf
-    for child in graph[node]:
-        if child not in ida_star_path:
-            ida_star_visited_nodes += 1
-            ida_star_path.append(child) #put child as the last one in the path
-            t, boolean = ida_star_rec(graph, weight, heuristic, goal, distance + weight[node,child], threshold)
-            if (boolean): #We have found the goal node, from one of the children (or children of children of ...)
-                return t, True
-            if (t < min):
-                min = t
-            ida_star_path.pop() #start popping our useless path (many pops will happen in a row if we have entered a huge path)
-    return min, False
\ No newline at end of file
+    """
+    Performs DFS up to a depth where a threshold is reached using f(n) = g(n)+h(n) (as opposed to interative-deepening DFS which stops at a fixed depth).
+    Returns (distance, found, path, visited, relaxed) where distance is the cost to the goal if found, or else the next-bigger threshold,
+    and relaxed is how many child distances we computed.
+
+    Also, a way to think about path is that it stores the path each node is right now. If it goes very deep the path will become huge, 
+    untill we start popping (this will happen when we reach a f(n) limit). on_path has exactly the same nodes as path, so checking if a child is 
+    already on our path is O(1) instead of searching the whole list.
+    Every entry of the stack is (the children of a node we have not looked at yet, distance from start node to that node) and mins[i] is the smallest
+    f(n) that breached the threshold under stack[i]. When we run out of children we pop the stack and "return" that min to the parent, 
+    which is exactly what the recursive version did.
+    """
+    def iteration(self, start, goal, threshold):
+        graph, weight, heuristic = self.graph, self.weight, self.heuristic
+        exact = self.exact
+        transposition_size = self.transposition_size
+        best_distance = {start: 0} #the transposition table, only used if transposition_size > 0
+        best = math.inf #cheapest goal found in this iteration, only used if the threshold is not exact
+        best_path = []
+        visited = 0
+        relaxed = 0
+
+        f = heuristic[start]
+        if f > threshold: #Breached threshold with heuristic
+            return f, False, [], visited, relaxed
+        if start == goal: # We have found the goal node
+            return 0, True, [start], visited, relaxed
+
+        path = [start]
+        on_path = {start}
+        stack = [(graph.adjacent(start), 0)]
+        mins = [math.inf]
+
+        while stack:
+            children, distance = stack[-1]
+            for child, edge in children: # ...then, for all child nodes....
+                if child in on_path:
+                    continue
+                child_distance = distance + weight[edge]
+                relaxed += 1
+                if transposition_size:
+                    seen = best_distance.get(child)
+                    if seen is not None and seen <= child_distance: #we were here before, with a cheaper (or the same) path
+                        continue
+                    if seen is not None or len(best_distance) < transposition_size:
+                        best_distance[child] = child_distance
+                visited += 1
+                f = child_distance + heuristic[child]
+                if f > threshold: #Breached threshold with heuristic
+                    if f < mins[-1]:
+                        mins[-1] = f
+                elif f >= best: #can't be cheaper than the goal we already found
+                    continue
+                elif child == goal: # We have found the goal node
+                    if exact:
+                        path.append(child)
+                        return child_distance, True, path, visited, relaxed
+                    best = child_distance #branch and bound, keep looking for a cheaper one under the threshold
+                    best_path = path + [child]
+                else: #go deeper, we will come back to the rest of the children of this node later
+                    path.append(child) #put child as the last one in the path
+                    on_path.add(child)
+                    stack.append((graph.adjacent(child), child_distance))
+                    mins.append(math.inf)
+                    break
+            else: #no more children, so return our min to the parent
+                stack.pop()
+                t = mins.pop()
+                on_path.discard(path.pop()) #start popping our useless path (many pops will happen in a row if we have entered a huge path)
+                if not mins: #we returned from the start node
+                    if best < math.inf:
+                        return best, True, best_path, visited, relaxed
+                    return t, False, path, visited, relaxed
+                if t < mins[-1]:
+                    mins[-1] = t
+
+def ida_star(graph, weight, heuristic, start, goal, transposition_size=0, threshold_factor=1.0, threshold_bucket=0, stats=None):
+    return IDAStar(graph, weight, heuristic, transposition_size, threshold_factor, threshold_bucket).search(start, goal, stats)
@@ -1,20 +1,85 @@
 from pathlib import Path
 from data import Data
+from jsonfile import save_json
+import json
 import math
 import time
 
 
+#The agent walks on node ids (see graph.py) and we translate the path back to node names only when we return it
+"""
+By default every solve() starts with an empty learned heuristic H, exactly like the first day.
+persistent = True keeps H (a list, index = node id) from day to day, so the agent remembers the dead ends it already walked into. In this
+mode every step is the standard LRTA* step (see lookahead): we look at every neighbor n with the real cost of the road to it (we can see the
+traffic of the roads that start where we stand, like traverseMinCost), move to the one with the smallest cost(current, n) + H[n] and learn
+H[current] = max(H[current], that smallest value). Our heuristic is admissible, so H only grows towards the real cost to the destination and
+the walks converge to the cheapest one. Since the real traffic changes, old knowledge can be wrong:
+    decay: every new day the learned part of H (H - Data.heuristic) is multiplied by decay (1 = keep everything, 0 = forget everything)
+    reset_threshold: if more than this fraction of the roads have a different real traffic than the last day we solved, forget H completely
+memory: a JSON file to load H from when we start, and to save it to with save(), so the learning also survives between runs.
+    It is only loaded if it was saved for the same <Roads> and destination.
+history: (day, moves, cost of all moves) of every solve(), to watch the walks get shorter.
+"""
 class OnlineLRTAstar():
 
-    def __init__(self, d):
+    def __init__(self, d, persistent=False, decay=1.0, reset_threshold=None, memory=None):
         self.d = d
+        self.persistent = persistent
+        self.decay = decay
+        self.reset_threshold = reset_threshold
+        self.memory = memory
+        self.H = None #the learned heuristic we keep, if persistent
+        self.last_traffic = None #the real traffic of the last day we solved, for reset_threshold
+        self.history = []
+        if persistent and memory is not None:
+            self.load()
+
+    def memory_key(self): #same <Roads> and destination, like Data.heuristic_cache_file
+        key = self.d.roads_hash.copy()
+        key.update(b"<Destination>" + self.d.destination.encode())
+        return key.hexdigest()
+
+    def load(self): #return True if we loaded H from memory
+        try:
+            with open(self.memory, "r") as f:
+                saved = json.load(f)
+        except (OSError, ValueError): #nothing saved yet
+            return False
+        if saved.get("key") != self.memory_key() or len(saved.get("H", [])) != len(self.d.graph):
+            return False
+        self.H = saved["H"]
+        return True
+
+    def save(self): #return True if we saved H, a memory file we can not write only costs us the learning of this run
+        if not self.persistent or self.memory is None or self.H is None:
+            return False
+        return save_json(self.memory, {"key": self.memory_key(), "H": self.H})
+
+    def learned_heuristic(self): #the H this solve starts with
+        if not self.persistent:
+            return [None]*len(self.d.graph)
+        traffic = self.d.real_traffic
+        if self.H is None:
+            self.H = [None]*len(self.d.graph)
+        elif self.reset_threshold is not None and self.last_traffic is not None and traffic:
+            changed = sum(1 for today, before in zip(traffic, self.last_traffic) if today != before)
+            if changed > self.reset_threshold*len(traffic):
+                self.H = [None]*len(self.d.graph)
+        if self.decay != 1.0 and self.history: #a new day, forget some of what we learned
+            heuristic = self.d.heuristic
+            self.H = [None if h is None else heuristic[node] + (h-heuristic[node])*self.decay for node, h in enumerate(self.H)]
+        self.last_traffic = list(traffic)
+        return self.H
 
     def solve(self):
         start_time = time.perf_counter() #time
 
+        graph = self.d.graph
+        destination = graph.ids[self.d.destination]
         parent = None
-        current = self.d.source
-        H = {}
+        current = graph.ids[self.d.source]
+        H = self.learned_heuristic() #learned heuristic, index = node id
+        persistent = self.persistent
         cost = {}
         all_moves_cost = 0
         path = []
@@ -22,10 +87,17 @@ class OnlineLRTAstar():
         while True:
             #print("Parent: ", parent, "Current: ", current)
             path.append(current)
-            if current == self.d.destination:
-                return (time.perf_counter()-start_time), all_moves_cost, path
-            if current not in H:
+            if current == destination:
+                self.history.append((self.d.day, len(path)-1, all_moves_cost))
+                return (time.perf_counter()-start_time), all_moves_cost, graph.to_names(path)
+            if H[current] is None:
                 H[current] = self.d.heuristic[current]
+            if persistent: #the standard LRTA* step
+                next_node, estimate, step_cost = self.lookahead(current, H)
+                H[current] = max(H[current], estimate)
+                parent, current = current, next_node
+                all_moves_cost += step_cost
+                continue
             if parent is not None:
                 H[parent] = cost[parent, current] + self.d.heuristic[current]
             parent = current
@@ -36,8 +108,8 @@ class OnlineLRTAstar():
     def chooseNextNode(self, current, H):
         min_estimated_cost = math.inf
         min_node = None
-        for node in self.d.graph[current]:
-            if node in H:
+        for node, _ in self.d.graph.adjacent(current):
+            if H[node] is not None:
                 if(min_estimated_cost > H[node]):
                     min_estimated_cost = H[node]
                     min_node = node
@@ -47,19 +119,26 @@ class OnlineLRTAstar():
                     min_node = node
         return min_node
 
+    #(the neighbor with the smallest real cost(current, n) + H[n], that smallest value, the real cost to move there), for the persistent mode
+    def lookahead(self, current, H):
+        heuristic = self.d.heuristic
+        best_estimate = math.inf
+        best_node = None
+        best_cost = math.inf
+        for node, _ in self.d.graph.adjacent(current):
+            step_cost = self.traverseMinCost(current, node)
+            estimate = step_cost + (H[node] if H[node] is not None else heuristic[node])
+            if estimate < best_estimate:
+                best_estimate, best_node, best_cost = estimate, node, step_cost
+        return best_node, best_estimate, best_cost
+
     def traverseMinCost(self, parent, current): #considering someone at node A can see the traffic to all the connecting roads towards B
         min_cost = math.inf
-        for road in self.d.road_info:
-            if(self.d.road_info[road][0:2] == (parent,current) or self.d.road_info[road][0:2] == (current,parent)):
-                normal_weight = self.d.road_info[road][2]
-                if(self.realTrafficCost(road, normal_weight) < min_cost):
-                    min_cost = self.realTrafficCost(road, normal_weight)
+        for road in self.d.edge_roads[self.d.graph.edge(parent, current)]: #only the roads connecting parent, current
+            real_cost = self.realTrafficCost(road)
+            if(real_cost < min_cost):
+                min_cost = real_cost
         return min_cost
 
-    def realTrafficCost(self, road, weight):
-        if(self.d.real_traffic[road] == "low"):
-            return self.d.weight_in_low_traffic(weight)
-        elif(self.d.real_traffic[road] == "heavy"):
-            return self.d.weight_in_heavy_traffic(weight)
-        else:
-            return weight
+    def realTrafficCost(self, road): #cost of the road (id) with today's real traffic
+        return self.d.road_cost[road][self.d.real_traffic[road]]
@@ -0,0 +1,58 @@
+import queue
+import threading
+
+#https://docs.python.org/3/library/queue.html
+"""
+A pipelined Test.do_everything, in three stages that run at the same time:
+
+reader (thread): reads the <Day> blocks of the predictions AND of the actual traffic of the next days from the two files
+    (Data.read_predictions, Data.read_actual_traffic) and puts them in a queue, up to depth days ahead
+solver (our thread): takes the blocks of a day and solves it with Test.solve_day, which only applies the blocks (no file I/O)
+writer (thread): gives every record to the sink, so formatting and printing happen while we solve the next day
+
+Only the solver touches our weights and the random numbers, in the same order as do_everything, so the results are exactly the same.
+The reader only touches the two file handles (and the solver never reads from them in a pipelined run).
+Python runs one thread at a time, so the overlap comes from the time the reader and the writer wait for the disk / the terminal.
+"""
+DONE = object() #no more records
+
+def read_days(data, days, ready):
+    try:
+        for _ in range(days):
+            ready.put((data.read_predictions(), data.read_actual_traffic()))
+    except BaseException as error: #give it to the solver, so it gets raised there
+        ready.put(error)
+
+def write_records(sink, records, errors):
+    while True:
+        record = records.get()
+        if record is DONE:
+            return
+        if not errors: #after an error we only empty the queue, so the solver never blocks
+            try:
+                sink.write(record)
+            except BaseException as error:
+                errors.append(error)
+
+def run_pipelined(test, days=80, depth=4):
+    ready = queue.Queue(maxsize=depth)
+    records = queue.Queue(maxsize=depth)
+    errors = []
+    reader = threading.Thread(target=read_days, args=(test.data, days, ready), daemon=True)
+    writer = threading.Thread(target=write_records, args=(test.sink, records, errors), daemon=True)
+    reader.start()
+    writer.start()
+
+    test.start()
+    try:
+        for _ in range(days):
+            blocks = ready.get()
+            if isinstance(blocks, BaseException):
+                raise blocks
+            records.put(test.solve_day(*blocks))
+    finally:
+        records.put(DONE)
+        writer.join()
+    if errors:
+        raise errors[0]
+    return test.finish(days)
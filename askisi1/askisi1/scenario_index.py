@@ -0,0 +1,60 @@
+from jsonfile import save_json
+import json
+import os
+
+"""
+One pass over a scenario file that finds the byte offset of every <Day> line, in <Predictions> AND in <ActualTrafficPerDay>.
+With it Data can seek straight to any day (parse_day_predictions(day), parse_actual_traffic(day)), so a run can replay or skip to day N and 
+parallel workers can each read only their own days, instead of reading the file strictly in order with readline().
+
+index = {"predictions": [offset of day 1, offset of day 2, ..], "actual": [offset of day 1, ..]}
+The offsets point at the "<Day>" line itself, because parse_day_predictions / parse_actual_traffic read (and skip) that line first.
+
+The index can also be saved next to the scenario file (filename + ".days.json", the "sidecar" file) together with the size and modification
+time of the scenario file, so the next run does not even need the one pass. If the scenario file changed, the sidecar is ignored.
+"""
+def index_days(path):
+    predictions = []
+    actual = []
+    days = predictions
+    offset = 0
+    with open(path, "rb") as f: #binary, so that offset is exactly the byte position we can seek() to
+        for line in f:
+            tag = line.strip()
+            if tag == b"<Day>":
+                days.append(offset)
+            elif tag == b"<ActualTrafficPerDay>":
+                days = actual
+            offset += len(line)
+    return {"predictions": predictions, "actual": actual}
+
+def sidecar_path(path):
+    return str(path) + ".days.json"
+
+def file_signature(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def load_index(path): #the index from the sidecar file, or None if there is no (valid) sidecar
+    try:
+        with open(sidecar_path(path), "r") as f:
+            saved = json.load(f)
+        if saved["signature"] == file_signature(path):
+            return {"predictions": saved["predictions"], "actual": saved["actual"]}
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+def save_index(path, index):
+    saved = {"signature": file_signature(path), "predictions": index["predictions"], "actual": index["actual"]}
+    save_json(sidecar_path(path), saved) #the sidecar is only an optimization
+
+def day_index(path, sidecar=False): #load the index from the sidecar (if sidecar=True), or create it (and save it, if sidecar=True)
+    if sidecar:
+        index = load_index(path)
+        if index is not None:
+            return index
+    index = index_days(path)
+    if sidecar:
+        save_index(path, index)
+    return index
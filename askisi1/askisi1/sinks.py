@@ -0,0 +1,150 @@
+import csv
+import io
+import json
+import sys
+
+"""
+Where Test sends its results. Test builds ONE record (a dictionary) for every day and gives it to its sink with write(record), and at the end
+of the run it gives the summary of the run (see Test.do_everything) to summary(summary). Every sink formats and writes these in its own way:
+
+ConsoleSink: the human readable output we always had (the same text), but every day is formatted in memory and written with one write.
+JsonlSink: one JSON line per day (and one last line with the summary), kept in memory and written every buffer_days days.
+CsvSink: one CSV row per day (the columns are algorithm_field, ex. UCS_visited, UCS_time), written every buffer_days days.
+NullSink: throws everything away, for benchmarks and batch runs that only need the summary.
+At the end of the run Test calls close(): every sink flushes, and JsonlSink / CsvSink close their file only if they opened it themselves
+(created with a path). A file or stream we gave them is ours to close.
+
+A record looks like:
+    {"day": 3,
+     "UCS": {"visited": 39, "time": 0.0001, "path": ["A", "B", ..], "predicted": 113.2, "real": 120.5, "roads": [["Road1", 12.0], ..]},
+     "IDA*": {..}, "A*": {..}, "LPA*": {..},
+     "LRTA*": {"time": 0.00002, "path": ["A", ..], "cost": 125.0, "moves": 6}}
+"roads" (the road we chose between every two nodes of the path, with its predicted weight) is there only if the sink is detailed,
+since finding the roads costs a lookup per node of every path.
+"""
+ALGORITHMS = ("UCS", "IDA*", "A*", "LPA*")
+
+class NullSink:
+    detailed = False #if the records need "roads"
+
+    def write(self, record):
+        pass
+
+    def summary(self, summary):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+class ConsoleSink(NullSink):
+    detailed = True
+
+    def __init__(self, stream=None, offset=4):
+        self.stream = stream #None = sys.stdout when we write (so redirect_stdout works too)
+        self.offset = offset
+
+    def out(self):
+        return self.stream or sys.stdout
+
+    def write(self, record):
+        buffer = io.StringIO()
+        print("DAY", record["day"], file=buffer)
+        for name in ALGORITHMS:
+            self.print_test(buffer, name, record[name])
+        lrta = record["LRTA*"]
+        print("LRTA* :", file=buffer)
+        print(" "*self.offset,"Execution time: ", '%f' % lrta["time"], file=buffer)
+        print(" "*self.offset,"Path: ", end="", file=buffer)
+        print(*lrta["path"], sep=" -> ", file=buffer)
+        print(" "*self.offset, "Cost Of All Moves:", lrta["cost"], file=buffer)
+        print(file=buffer)
+        self.out().write(buffer.getvalue())
+
+    def summary(self, summary):
+        out = self.out()
+        print("Average daily Uniform Cost Search (UCS) cost: ", "{:.2f}".format(round(summary["UCS"]["predicted"], 2)), file=out)
+        print("Average daily Iterative Deepening A* (IDA*) cost: ", "{:.2f}".format(round(summary["IDA*"]["predicted"], 2)), file=out)
+        print("Average daily A* cost: ", "{:.2f}".format(round(summary["A*"]["predicted"], 2)), file=out)
+        print(file=out)
+
+    def flush(self):
+        self.out().flush()
+
+    def print_test(self, buffer, alg_name, result):
+        print(alg_name,":", file=buffer)
+        print(" "*self.offset,"Visited Nodes Number: ", result["visited"], file=buffer)
+        print(" "*self.offset,"Execution time: ", '%f' % result["time"], file=buffer)
+        print(" "*self.offset,"Path: ", end="", file=buffer)
+        print(*result["path"], sep=" -> ", file=buffer)
+        self.print_cost_of_roads(buffer, result["roads"])
+        print(" "*self.offset,"Predicted Cost:", "{:.2f}".format(round(result["predicted"], 2)), file=buffer)
+        print(" "*self.offset,"Real Cost: ", "{:.2f}".format(round(result["real"], 2)), file=buffer)
+
+    def print_cost_of_roads(self, buffer, roads):
+        print(" "*self.offset,"Road Cost:", end = " ", file=buffer)
+        for i, (road, weight) in enumerate(roads):
+            if(i != len(roads)-1):
+                print(road, "(", "{:.2f}".format(round(float(weight), 2)),") ->", end=" ", file=buffer)
+            else:
+                print(road, "(", "{:.2f}".format(round(float(weight), 2)),")", file=buffer)
+
+class FileSink(NullSink): #the buffering of JsonlSink and CsvSink. target = a path or an open file
+    def __init__(self, target, buffer_days=100, detailed=False):
+        self.own_file = isinstance(target, (str, bytes)) or hasattr(target, "__fspath__")
+        self.file = open(target, "w", newline="") if self.own_file else target
+        self.buffer_days = buffer_days
+        self.detailed = detailed
+        self.lines = []
+
+    def add(self, line):
+        self.lines.append(line)
+        if len(self.lines) >= self.buffer_days:
+            self.flush()
+
+    def flush(self):
+        if self.lines:
+            self.file.write("".join(self.lines))
+            self.lines = []
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        if self.own_file:
+            self.file.close()
+
+class JsonlSink(FileSink):
+    def write(self, record):
+        self.add(json.dumps(record) + "\n")
+
+    def summary(self, summary):
+        self.add(json.dumps({"summary": summary}) + "\n")
+
+class CsvSink(FileSink):
+    FIELDS = ("visited", "time", "predicted", "real", "path")
+
+    def __init__(self, target, buffer_days=100, detailed=False):
+        super().__init__(target, buffer_days, detailed)
+        self.header = ["day"] + [name + "_" + field for name in ALGORITHMS for field in self.FIELDS] + ["LRTA*_time", "LRTA*_cost", "LRTA*_moves", "LRTA*_path"]
+        if detailed:
+            self.header += [name + "_roads" for name in ALGORITHMS]
+        self.add(self.row(self.header))
+
+    def row(self, values):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(values)
+        return buffer.getvalue()
+
+    def write(self, record):
+        values = [record["day"]]
+        for name in ALGORITHMS:
+            for field in self.FIELDS:
+                value = record[name][field]
+                values.append(" -> ".join(value) if field == "path" else value)
+        lrta = record["LRTA*"]
+        values += [lrta["time"], lrta["cost"], lrta["moves"], " -> ".join(lrta["path"])]
+        if self.detailed:
+            values += [" -> ".join(road + " (" + str(weight) + ")" for road, weight in record[name]["roads"]) for name in ALGORITHMS]
+        self.add(self.row(values))
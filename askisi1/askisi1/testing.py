@@ -2,70 +2,97 @@ import sys
 from pathlib import Path
 from data import Data
 from online_algorithms import OnlineLRTAstar
+from sinks import ConsoleSink, NullSink
 
 class Test:
-    def __init__(self, filename):
+    #sink: where the results of every day go (see sinks.py), by default the console. quiet = True to not output anything (NullSink)
+    #lrta_options: the options of our OnlineLRTAstar, ex. {"persistent": True, "decay": 0.9, "memory": "lrta.json"} (see online_algorithms.py)
+    def __init__(self, filename, sink=None, quiet=False, lrta_options=None):
         self.data = Data(filename)
-        self.offset = 4
-        self.lrta = OnlineLRTAstar(self.data)
+        self.lrta = OnlineLRTAstar(self.data, **(lrta_options or {}))
+        if quiet:
+            self.sink = NullSink()
+        else:
+            self.sink = sink if sink is not None else ConsoleSink()
         
-    def do_everything(self):
-        ucs_sum_cost = 0
-        ida_star_sum_cost = 0
+    """
+    Solve every day with every algorithm and give the results of every day (one record, see sinks.py) to our sink.
+    Returns a summary of the run: for every algorithm the average daily predicted cost, real cost, execution time and visited nodes
+    (LRTA* only has time and cost), so many runs can be compared (see batch.py).
+    pipelined = True to read the files and write the results in other threads while we solve (see pipeline.py), same results.
+    """
+    def do_everything(self, days=80, pipelined=False):
+        if pipelined:
+            from pipeline import run_pipelined
+            return run_pipelined(self, days)
+        self.start()
+        for _ in range(days):
+            self.sink.write(self.solve_day())
+        return self.finish(days)
 
-        for _ in range(80):
-            self.data.parse_day_predictions() #parse the daily predictions and fix weight, road_weight (dictionaries)
+    def start(self): #before the first day
+        self.sums = {name: {"predicted": 0, "real": 0, "time": 0, "visited": 0} for name in ("UCS", "IDA*", "A*", "LPA*")}
+        self.sums["LRTA*"] = {"cost": 0, "time": 0}
 
-            ucs_time, ucs_visited_nodes, ucs_cost, ucs_path = self.data.find_ucs_path() #solve the graph using ucs
+    #solve one day and return its record. predictions, actual = the blocks of the day if they were already read (see Data.read_predictions)
+    def solve_day(self, predictions=None, actual=None):
+        sums = self.sums
+        self.data.parse_day_predictions(block=predictions) #parse the daily predictions and fix weight, road_weight (dictionaries)
 
-            ida_star_time, ida_star_visited_nodes, ida_star_cost, ida_star_path = self.data.find_ida_star_path() #solve the graph using ida*
+        ucs_time, ucs_visited_nodes, ucs_cost, ucs_path = self.data.find_ucs_path() #solve the graph using ucs
 
-            ucs_sum_cost += ucs_cost
-            ida_star_sum_cost += ida_star_cost
+        #solve the graph using ida*, with a transposition table big enough for every node of our graph
+        ida_star_time, ida_star_visited_nodes, ida_star_cost, ida_star_path = self.data.find_ida_star_path(len(self.data.graph))
 
-            self.data.parse_actual_traffic()  #parse the real daily traffic
-            self.data.fix_propabilities()  #fix p1,p2,p3 based on our real traffic (and predicted traffic, last day)
+        astar_time, astar_visited_nodes, astar_cost, astar_path = self.data.find_astar_path() #solve the graph using a*
 
-            lrta_time, lrta_sum_cost , lrta_path = self.lrta.solve()
+        #repair yesterday's search with the edges that changed, lpa_star_visited_nodes = how many nodes were reprocessed today
+        lpa_star_time, lpa_star_visited_nodes, lpa_star_cost, lpa_star_path = self.data.find_lpa_star_path()
 
-            ucs_real_cost = self.data.find_real_cost(ucs_path) #find the real cost of our chosen path (based on real traffic)
-            ida_star_real_cost = self.data.find_real_cost(ida_star_path)
-            
-            #self.data.print_test()
-            print("DAY", self.data.day)
-            self.print_test("UCS", ucs_visited_nodes, ucs_time, ucs_path, ucs_cost, ucs_real_cost)
-            self.print_test("IDA*", ida_star_visited_nodes, ida_star_time, ida_star_path, ida_star_cost, ida_star_real_cost)
-            print("LRTA* :")
-            print(" "*self.offset,"Execution time: ", '%f' % lrta_time)
-            print(" "*self.offset,"Path: ", end="")
-            print(*lrta_path, sep=" -> ")
-            print(" "*self.offset, "Cost Of All Moves:", lrta_sum_cost)
-            print()
+        self.data.parse_actual_traffic(block=actual)  #parse the real daily traffic
+        self.data.fix_propabilities()  #fix p1,p2,p3 based on our real traffic (and predicted traffic, last day)
 
-            self.data.next_day() #change the day (data.day++) and reset weight, chosen_road (dictionaries)
-        print("Average daily Uniform Cost Search (UCS) cost: ", "{:.2f}".format(round(ucs_sum_cost/80.0, 2)))
-        print("Average daily Iterative Deepening A* (IDA*) cost: ", "{:.2f}".format(round(ida_star_sum_cost/80.0, 2)))
-        print()
+        lrta_time, lrta_sum_cost , lrta_path = self.lrta.solve()
 
-    def print_test(self, alg_name, visited_nodes, time, path, prediction_cost, real_cost):
-        print(alg_name,":")
-        print(" "*self.offset,"Visited Nodes Number: ", visited_nodes)
-        print(" "*self.offset,"Execution time: ", '%f' % time)
-        print(" "*self.offset,"Path: ", end="")
-        print(*path, sep=" -> ")
-        self.print_cost_of_roads(path)
-        print(" "*self.offset,"Predicted Cost:", "{:.2f}".format(round(prediction_cost, 2)))
-        print(" "*self.offset,"Real Cost: ", "{:.2f}".format(round(real_cost, 2)))
+        ucs_real_cost = self.data.find_real_cost(ucs_path) #find the real cost of our chosen path (based on real traffic)
+        ida_star_real_cost = self.data.find_real_cost(ida_star_path)
+        astar_real_cost = self.data.find_real_cost(astar_path)
+        lpa_star_real_cost = self.data.find_real_cost(lpa_star_path)
 
-    def print_cost_of_roads(self, path):
-        print(" "*self.offset,"Road Cost:", end = " ")
-        for i in range(len(path)-1):
-            if(i != len(path)-2):
-                print(self.data.chosen_road[path[i],path[i+1]], "(", 
-                "{:.2f}".format(round(float(self.data.weight[path[i],path[i+1]]), 2)),") ->", end=" ")
-            else:
-                print(self.data.chosen_road[path[i],path[i+1]], "(", 
-                "{:.2f}".format(round(float(self.data.weight[path[i],path[i+1]]), 2)),")")
+        record = {"day": self.data.day}
+        for name, time, visited_nodes, path, cost, real_cost in (
+                ("UCS", ucs_time, ucs_visited_nodes, ucs_path, ucs_cost, ucs_real_cost),
+                ("IDA*", ida_star_time, ida_star_visited_nodes, ida_star_path, ida_star_cost, ida_star_real_cost),
+                ("A*", astar_time, astar_visited_nodes, astar_path, astar_cost, astar_real_cost),
+                ("LPA*", lpa_star_time, lpa_star_visited_nodes, lpa_star_path, lpa_star_cost, lpa_star_real_cost)):
+            sums[name]["predicted"] += cost
+            sums[name]["real"] += real_cost
+            sums[name]["time"] += time
+            sums[name]["visited"] += visited_nodes
+            record[name] = self.result(visited_nodes, time, path, cost, real_cost)
+        sums["LRTA*"]["cost"] += lrta_sum_cost
+        sums["LRTA*"]["time"] += lrta_time
+        record["LRTA*"] = {"time": lrta_time, "path": lrta_path, "cost": lrta_sum_cost, "moves": len(lrta_path)-1}
+
+        self.data.next_day() #change the day (data.day++) and reset weight, chosen_road (dictionaries)
+        return record
 
+    def finish(self, days): #after the last day (and after the sink got every record), return the summary
+        summary = {name: {key: value/days for key, value in values.items()} for name, values in self.sums.items()}
+        self.sink.summary(summary)
+        self.sink.close() #flushes it, and closes its file if the sink opened it from a path (a file or stream we gave it stays open)
+        self.lrta.save() #if the lrta remembers what it learned between runs
+        return summary
 
+    def result(self, visited_nodes, time, path, prediction_cost, real_cost): #the record of one algorithm for today
+        result = {"visited": visited_nodes, "time": time, "path": path, "predicted": prediction_cost, "real": real_cost}
+        if self.sink.detailed:
+            result["roads"] = self.cost_of_roads(path)
+        return result
 
+    def cost_of_roads(self, path): #[(road name, predicted weight), ..] of the road we chose between every two nodes of path
+        roads = []
+        for i in range(len(path)-1):
+            edge = self.data.edge(path[i],path[i+1])
+            roads.append((self.data.road_names[self.data.chosen_road[edge]], self.data.weight[edge]))
+        return roads
@@ -0,0 +1,21 @@
+from decimal import Decimal
+
+"""
+Traffic levels as small integer codes, so we never compare strings in our loops. road_cost[road][traffic] (see Data) is the cost of a road
+in that traffic, so a cost lookup is just two indexes. Any traffic string we dont know is treated as "normal", like the original if/else did.
+"""
+LOW, NORMAL, HEAVY = 0, 1, 2
+TRAFFIC_CODE = {"low": LOW, "normal": NORMAL, "heavy": HEAVY}
+TRAFFIC_NAME = ("low", "normal", "heavy") #code -> string, for printing
+
+def traffic_code(traffic):
+    return TRAFFIC_CODE.get(traffic, NORMAL)
+
+def weight_in_heavy_traffic(number):
+    return float(Decimal(number)*Decimal(1.25))
+
+def weight_in_low_traffic(number):
+    return float(Decimal(number)*Decimal(0.9))
+
+def road_costs(normal): #(low cost, normal cost, heavy cost) of a road with this normal cost, in the order of the codes
+    return (weight_in_low_traffic(normal), normal, weight_in_heavy_traffic(normal))
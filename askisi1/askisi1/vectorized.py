@@ -0,0 +1,66 @@
+import numpy as np
+from traffic import LOW, NORMAL, HEAVY
+
+#https://numpy.org/doc/stable/reference/generated/numpy.ufunc.at.html
+"""
+The batched (numpy) version of Data.parse_day_predictions + Data.prediction_weight, for a WHOLE day at once.
+numpy is only needed if we use Data.parse_day_predictions(batched=True), so data.py imports this module only then.
+
+Traffic is a small integer code (see traffic.py), and costs = numpy array of Data.road_cost, so costs[road] = (low cost, normal cost, heavy cost).
+prediction_weight draws a random number and, depending on p1 (correct prediction), p2 (overestimation) and p3 (underestimation), picks
+which of the three costs the road will have. So we put the random number in a "bucket" (0: rand <= p1, 1: rand <= p1+p2, 2: else)
+and OUTCOME[predicted traffic, bucket] is the traffic whose cost we use, EXACTLY the same table as the if/else of prediction_weight:
+    predicted low:    low,    low (overestimation),    normal (underestimation)
+    predicted normal: normal, low (overestimation),    heavy (underestimation)
+    predicted heavy:  heavy,  normal (overestimation), heavy (underestimation)
+"""
+OUTCOME = np.array([[LOW, LOW, NORMAL],
+                    [NORMAL, LOW, HEAVY],
+                    [HEAVY, NORMAL, HEAVY]], dtype=np.int8)
+
+def as_array(values, dtype): #the road ids / traffic codes of a day as an array: a range or a memoryview (compiled files) without a python loop
+    if isinstance(values, range):
+        return np.arange(values.start, values.stop, values.step, dtype=dtype)
+    if isinstance(values, memoryview):
+        return np.frombuffer(values, dtype=np.dtype(values.format)).astype(dtype)
+    return np.array(values, dtype=dtype)
+
+def predicted_costs(costs, roads, traffic, rand, p1, p2): #the cost of each road of the day, roads/traffic/rand are arrays of the same length
+    bucket = (rand > p1).astype(np.int8) + (rand > p1+p2)
+    return costs[roads, OUTCOME[traffic, bucket]]
+
+"""
+Scatter-min of the day's road costs into their edges: weight[edge] = the cheapest cost of all the roads of the day that connect the two nodes, and
+chosen[edge] = the index (in roads) of that cheapest road. If two roads have the same cost we keep the one that came first in the file,
+like parse_day_predictions does. Edges without any road this day get weight = inf and chosen = -1.
+"""
+def cheapest_per_edge(road_edge, roads, cost, number_of_edges):
+    edges = road_edge[roads]
+    weight = np.full(number_of_edges, np.inf)
+    np.minimum.at(weight, edges, cost)
+
+    #argmin with a second scatter-min: of the roads whose cost IS the minimum of their edge, keep the smallest position in the file
+    cheapest = np.flatnonzero(cost == weight[edges])
+    chosen = np.full(number_of_edges, len(roads), dtype=np.int64)
+    np.minimum.at(chosen, edges[cheapest], cheapest)
+    chosen[chosen == len(roads)] = -1
+    return weight, chosen
+
+"""
+The customization of a CCH (see cch.py) one level of the elimination tree at a time: the triangles (v, u, w) of a level are
+triangle_*[starts[level]:starts[level+1]] and they only read arcs that lower levels finished, so a whole level is one scatter-min:
+metric[uw] = min(metric[uw], metric[vu] + metric[vw]). middle[uw] = v for the triangles that made an arc cheaper (if two triangles of a level
+give the same weight we keep any of them, both unpack to a path of that weight). metric is changed in place, returns middle.
+"""
+def customize_levels(metric, vu, vw, uw, v, starts):
+    middle = np.full(len(metric), -1, dtype=np.int32)
+    for start, end in zip(starts, starts[1:]):
+        if start == end:
+            continue
+        arcs = uw[start:end]
+        through = metric[vu[start:end]]+metric[vw[start:end]]
+        before = metric[arcs]
+        np.minimum.at(metric, arcs, through)
+        better = (through < before) & (through == metric[arcs])
+        middle[arcs[better]] = v[start:end][better]
+    return middle
@@ -0,0 +1,138 @@
+from array import array
+from itertools import compress, repeat
+import operator
+
+"""
+    The daily weight of every edge (and the road it came from), with epoch stamps and a history of every day
+
+    ...
+
+    Every edge has a stamp, the epoch (a day counter of the store, not Data.day) in which it was set for the last time. An edge is "set" today only
+    if its stamp is the current epoch, so a new day is just epoch += 1 and we never have to walk all the edges to reset them to None.
+    weight and road are plain lists (the searches index them directly, see Data.weight and Data.chosen_road) and they are changed in place,
+    never replaced.
+
+    Every day ends up as a column: column (today's weights) and road_column (today's roads) are arrays with UNSET / -1 for the edges without
+    a road. seal() makes them after the one by one parsing, load() takes them ready from the numpy arrays of the batched parsing.
+    end_day(day) appends them to history_weight and history_road, two flat arrays with one column (number_of_edges values) per day, so we
+    can look at (or replay) any past day without parsing it or drawing its random numbers again.
+
+    Nothing here walks the edges in a python loop: the passes over all the edges are array / itertools operations that run in C
+    (stamp.count, compress(map(operator.ne, ..)), array copies), and the python loops only visit the edges WITHOUT a road today, which are
+    usually none. changed_edges() compares today's column with the last one in the history (or with any column we give it, ex. the one LPA* last
+    planned on, see Data.find_lpa_star_path), with one numpy comparison if the day came from numpy.
+
+    Attributes
+    ----------
+    weight : List
+        edge id -> today's weight (None if not set)
+    road : List
+        edge id -> today's chosen road id (None if not set)
+    stamp : array
+        edge id -> the epoch the edge was set in
+    epoch : int
+        The current epoch
+    column, road_column : array
+        Today's weights and roads (UNSET, -1 for the edges without a road), None until the day is sealed or loaded
+    vector : numpy array
+        Today's weights as the numpy array load() got them (None if the day did not come from numpy)
+    history_weight, history_road : array
+        The columns of every day we ended
+    columns : Dictionary
+        day -> its column in the history
+"""
+UNSET = float("inf") #the weight of an edge without a road, in a column
+
+class WeightStore:
+    def __init__(self, number_of_edges):
+        self.number_of_edges = number_of_edges
+        self.weight = [None]*number_of_edges
+        self.road = [None]*number_of_edges
+        self.stamp = array("i", [0])*number_of_edges #0 = never set
+        self.epoch = 1
+        self.column = None
+        self.road_column = None
+        self.vector = None
+        self.history_weight = array("d")
+        self.history_road = array("i")
+        self.columns = {}
+        self.last_column = None #the column of the last day we ended, what changed_edges compares with by default
+
+    def new_day(self): #O(1), every edge is "unset" now
+        self.epoch += 1
+        self.column = self.road_column = self.vector = None
+
+    def unset_edges(self): #the edges whose stamp is not today's epoch
+        if self.stamp.count(self.epoch) == self.number_of_edges:
+            return []
+        return list(compress(range(self.number_of_edges), map(operator.ne, self.stamp, repeat(self.epoch))))
+
+    def seal(self): #after the one by one parsing of a day: None for every edge that was not set today, and make today's columns
+        weight, road = self.weight, self.road
+        unset = self.unset_edges()
+        for edge in unset:
+            weight[edge] = road[edge] = None
+        if unset: #the arrays need numbers
+            weight, road = weight[:], road[:]
+            for edge in unset:
+                weight[edge], road[edge] = UNSET, -1
+        self.column = array("d", weight)
+        self.road_column = array("i", road)
+
+    #set the whole day at once from numpy arrays: weight (float64, UNSET for no road) and road (int32 road ids, -1 for no road),
+    #see Data.parse_day_predictions_batched
+    def load(self, weight, road):
+        self.vector = weight
+        self.column = array("d", weight.tobytes())
+        self.road_column = array("i", road.tobytes())
+        self.fill(weight.tolist(), road.tolist(), (road < 0).nonzero()[0].tolist())
+
+    def fill(self, weights, roads, unset): #today's lists (in place) and stamps, from lists that have UNSET / -1 on the unset edges
+        self.weight[:] = weights
+        self.road[:] = roads
+        self.stamp[:] = array("i", [self.epoch])*self.number_of_edges
+        for edge in unset:
+            self.weight[edge] = self.road[edge] = None
+            self.stamp[edge] = 0
+
+    def end_day(self, day): #keep today's weights and roads in the history
+        if self.column is None: #a day without predictions, every edge is unset
+            self.column = array("d", [UNSET])*self.number_of_edges
+            self.road_column = array("i", [-1])*self.number_of_edges
+        self.last_column = len(self.columns)
+        self.columns[day] = self.last_column
+        self.history_weight.extend(self.column)
+        self.history_road.extend(self.road_column)
+
+    def day_columns(self, day): #(weight column, road column) of a day we ended
+        start = self.columns[day]*self.number_of_edges
+        end = start+self.number_of_edges
+        return self.history_weight[start:end], self.history_road[start:end]
+
+    def day(self, day): #(weight list, road list) of a day we ended, with None for the edges that were not set
+        weight, road = self.day_columns(day)
+        weights, roads = weight.tolist(), road.tolist()
+        for edge in compress(range(self.number_of_edges), map(operator.eq, weight, repeat(UNSET))):
+            weights[edge] = roads[edge] = None
+        return weights, roads
+
+    def restore(self, day): #make a past day today's weights again (in place), so we can run the searches on it again
+        self.column, self.road_column = self.day_columns(day)
+        self.vector = None
+        unset = list(compress(range(self.number_of_edges), map(operator.eq, self.column, repeat(UNSET))))
+        self.fill(self.column.tolist(), self.road_column.tolist(), unset)
+
+    def last_day_column(self): #the weight column of the last day we ended (every edge UNSET if we didnt end any)
+        if self.last_column is None:
+            return array("d", [UNSET])*self.number_of_edges
+        start = self.last_column*self.number_of_edges
+        return self.history_weight[start:start+self.number_of_edges]
+
+    #the edges whose weight today is different from previous (a column), by default the last day we ended. UNSET == UNSET, so no road in both
+    #is no change
+    def changed_edges(self, previous=None):
+        if previous is None:
+            previous = self.last_day_column()
+        if self.vector is not None: #one numpy comparison
+            return set((self.vector != previous).nonzero()[0].tolist())
+        return set(compress(range(self.number_of_edges), map(operator.ne, self.column, previous)))
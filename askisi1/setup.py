@@ -4,6 +4,9 @@ setup(
     name="askisi1",
     version="0.1.0",
     packages=["askisi1"],
+    extras_require={
+        "numpy": ["numpy"]
+    },
     entry_points={
         "console_scripts": [
             "askisi1 = askisi1.__main__:main"